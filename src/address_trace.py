@@ -0,0 +1,204 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+Decodes memory traces into the (page, offset, byte-select) fields of a
+chip described by an AddressParser. Traces are either text, one hex
+address per line (or separated by any whitespace), or raw binary
+little-endian words. Files are read through `mmap` a chunk at a time, so
+memory stays bounded however large the trace is, and the fields of each
+chunk are extracted with whole-array operations (NumPy when installed).
+'''
+import argparse
+from array import array
+from collections import Counter
+import mmap
+import os
+import sys
+
+from .page_address_calc import AddressParser
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Bytes decoded at a time
+CHUNK_BYTES = 1 << 22
+# array typecode and NumPy dtype for each supported word size
+WORD_TYPES = {
+    2: ("H", "<u2"),
+    4: ("I", "<u4"),
+    8: ("Q", "<u8"),
+}
+
+def decode_fields(chip, addresses):
+    '''
+    Splits every address into its fields for the AddressParser `chip`.
+    Returns `(pages, offsets, byte_sels, invalid)` where `invalid` lists
+    the indices of the addresses outside of the chip (their fields are
+    meaningless). NumPy arrays are decoded as NumPy arrays.
+    '''
+    if numpy is not None and isinstance(addresses, numpy.ndarray):
+        addresses = addresses.astype(numpy.uint64, copy=False)
+        pages = addresses >> numpy.uint64(chip.page_shift)
+        offsets = (addresses >> numpy.uint64(chip.byte_bits)) \
+            & numpy.uint64(chip.offs_mask)
+        byte_sels = addresses & numpy.uint64(chip.byte_mask)
+        if chip.total_bits >= 64:
+            invalid = numpy.flatnonzero(numpy.zeros(len(addresses)))
+        else:
+            invalid = numpy.flatnonzero(
+                addresses >> numpy.uint64(chip.total_bits))
+        return pages, offsets, byte_sels, invalid
+    shift = chip.page_shift
+    byte_bits = chip.byte_bits
+    offs_mask = chip.offs_mask
+    byte_mask = chip.byte_mask
+    limit = 1 << chip.total_bits
+    pages = [address >> shift for address in addresses]
+    offsets = [address >> byte_bits & offs_mask for address in addresses]
+    byte_sels = [address & byte_mask for address in addresses]
+    invalid = [i for i, address in enumerate(addresses)
+               if not 0 <= address < limit]
+    return pages, offsets, byte_sels, invalid
+
+def map_file(trace_file):
+    '''A read-only map of the open `trace_file`, None if it is empty'''
+    if os.fstat(trace_file.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(trace_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def iter_binary_words(path, word_bytes=4, chunk_bytes=CHUNK_BYTES):
+    '''
+    Yields the little-endian words of a binary trace, a chunk at a time,
+    as NumPy arrays or (without NumPy) `array`s. Raises ValueError if
+    the file is not a whole number of words.
+    '''
+    typecode, dtype = WORD_TYPES[word_bytes]
+    step = max(chunk_bytes - chunk_bytes % word_bytes, word_bytes)
+    with open(path, "rb") as trace_file:
+        data = map_file(trace_file)
+        if data is None:
+            return
+        with data:
+            if len(data) % word_bytes:
+                raise ValueError("Trace is not a whole number of words")
+            for start in range(0, len(data), step):
+                chunk = data[start:start + step]
+                if numpy is not None:
+                    yield numpy.frombuffer(chunk, dtype)
+                    continue
+                words = array(typecode)
+                words.frombytes(chunk)
+                if sys.byteorder == "big":
+                    words.byteswap()
+                yield words
+
+def iter_text_addresses(path, chunk_bytes=CHUNK_BYTES):
+    '''
+    Yields the hex addresses of a text trace as lists of ints, a chunk at
+    a time. An address cut off at the end of a chunk is carried over to
+    the next one, so chunks stay bounded however the addresses are laid
+    out (one per line, or all on one line).
+    '''
+    with open(path, "rb") as trace_file:
+        data = map_file(trace_file)
+        if data is None:
+            return
+        with data:
+            carry = b""
+            for start in range(0, len(data), chunk_bytes):
+                chunk = carry + data[start:start + chunk_bytes]
+                carry = b""
+                if start + chunk_bytes < len(data) and \
+                        not chunk[-1:].isspace():
+                    # The last address may go on in the next chunk
+                    parts = chunk.rsplit(None, 1)
+                    chunk, carry = parts if len(parts) == 2 \
+                        else (b"", parts[0])
+                tokens = chunk.split()
+                if tokens:
+                    yield [int(token, 16) for token in tokens]
+
+def decode_trace(path, chip, binary=False, word_bytes=4,
+                 chunk_bytes=CHUNK_BYTES):
+    '''
+    Yields `(first_index, addresses, pages, offsets, byte_sels, invalid)`
+    for each chunk of the trace at `path`, where `first_index` is the
+    position of the chunk's first address in the trace (see
+    `decode_fields` for the rest).
+    '''
+    if binary:
+        chunks = iter_binary_words(path, word_bytes, chunk_bytes)
+    else:
+        chunks = iter_text_addresses(path, chunk_bytes)
+    first_index = 0
+    for addresses in chunks:
+        yield (first_index, addresses) + decode_fields(chip, addresses)
+        first_index += len(addresses)
+
+def summarize_trace(path, chip, binary=False, word_bytes=4,
+                    chunk_bytes=CHUNK_BYTES):
+    '''
+    Decodes a whole trace and returns a dict with the number of
+    `addresses`, the indices of the `invalid` ones and a Counter of the
+    accesses to each of the `pages`.
+    '''
+    total = 0
+    invalid = []
+    pages = Counter()
+    for first_index, addresses, chunk_pages, _, _, chunk_invalid in \
+            decode_trace(path, chip, binary, word_bytes, chunk_bytes):
+        total += len(addresses)
+        invalid.extend(first_index + int(i) for i in chunk_invalid)
+        if numpy is not None and isinstance(chunk_pages, numpy.ndarray):
+            if len(chunk_invalid):
+                chunk_pages = numpy.delete(chunk_pages, chunk_invalid)
+            values, counts = numpy.unique(chunk_pages, return_counts=True)
+            pages.update(dict(zip(values.tolist(), counts.tolist())))
+            continue
+        if chunk_invalid:
+            bad = set(chunk_invalid)
+            chunk_pages = [page for i, page in enumerate(chunk_pages)
+                           if i not in bad]
+        pages.update(chunk_pages)
+    return {"addresses": total, "invalid": invalid, "pages": pages}
+
+def main(argv=None):
+    '''Prints the busiest pages of a trace'''
+    parser = argparse.ArgumentParser(description="Decode a memory trace")
+    parser.add_argument("trace")
+    parser.add_argument("page_bits", type=int)
+    parser.add_argument("offs_bits", type=int)
+    parser.add_argument("byte_bits", type=int)
+    parser.add_argument("--binary", action="store_true",
+                        help="raw little-endian words instead of hex text")
+    parser.add_argument("--word-bytes", type=int, default=4,
+                        choices=sorted(WORD_TYPES))
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+    chip = AddressParser(args.page_bits, args.offs_bits, args.byte_bits)
+    summary = summarize_trace(args.trace, chip, args.binary, args.word_bytes)
+    print("Addresses: {}, invalid: {}".format(summary["addresses"],
+                                              len(summary["invalid"])))
+    for page, count in summary["pages"].most_common(args.top):
+        print("Page {}: {} accesses".format(page, count))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+Runs a file of jobs, mixing truth tables and page address queries, and
+streams one JSON result per job, in input order. Jobs are JSON Lines,
+
+    {"type": "truth_table", "exp": "A*B+!C", "max_vars": 5}
+    {"type": "page", "page_bits": 4, "offs_bits": 13, "byte_bits": 0,
+     "page": 7}
+
+or CSV with the same keys as columns (empty cells are left out). An
+optional "id" is copied to the result. Jobs run across a process pool,
+and results are kept in a content-addressed cache directory (keyed by
+the SHA-256 of the job) so a re-run only computes what is new:
+
+    python -m src.batch_runner nightly.jsonl --cache-dir .batch_cache
+'''
+import argparse
+from collections import deque
+import csv
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+from .boolean_expr_parser import build_truth_table
+from .page_address_calc import AddressParser
+
+# Part of every cache key, bump it when results change
+CACHE_VERSION = 1
+# Keys of each job type, with their types and defaults (None: required)
+JOB_FIELDS = {
+    "truth_table": {"exp": (str, None), "max_vars": (int, 5),
+                    "long_names": (bool, False)},
+    "page": {"page_bits": (int, None), "offs_bits": (int, None),
+             "byte_bits": (int, None), "page": (int, None)},
+}
+# Keys that may be given as null ("none" in CSV): an unlimited table
+NULLABLE_FIELDS = {"max_vars"}
+
+def normalize_job(job):
+    '''
+    Checks a job and returns it with defaults filled in and its values
+    converted (CSV cells are strings). Raises ValueError if it is bad.
+    '''
+    fields = JOB_FIELDS.get(job.get("type"))
+    if fields is None:
+        raise ValueError("Unknown job type: {}".format(job.get("type")))
+    normal = {"type": job["type"]}
+    for key, (kind, default) in fields.items():
+        value = job.get(key, default)
+        if key in NULLABLE_FIELDS and (value is None or (
+                isinstance(value, str) and value.strip().lower() in
+                ("none", "null"))):
+            normal[key] = None
+            continue
+        if value is None:
+            raise ValueError("Missing `{}`".format(key))
+        if kind is bool and isinstance(value, str):
+            value = value.strip().lower() in ("1", "true", "yes")
+        normal[key] = kind(value)
+    return normal
+
+def job_key(job):
+    '''The content address of a normalized job'''
+    text = json.dumps([CACHE_VERSION, job], sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def run_job(job):
+    '''
+    Runs a normalized job, returning `(result, error)` where one of them
+    is None. Errors returned are a property of the job, anything else is
+    raised.
+    '''
+    if job["type"] == "truth_table":
+        return build_truth_table(job["exp"], job["max_vars"],
+                                 job["long_names"])
+    chip = AddressParser(job["page_bits"], job["offs_bits"],
+                         job["byte_bits"])
+    addresses = chip.get_start_end(job["page"])
+    if not isinstance(addresses, list):
+        return (None, addresses)
+    return (addresses, None)
+
+def run_jobs(jobs):
+    '''
+    Runs a chunk of jobs in a worker, see `run_job`. Returns a list of
+    `(result, cacheable)` per job. A job that raised gets an error result
+    that is not cacheable, since the failure may not happen again.
+    '''
+    results = []
+    for job in jobs:
+        try:
+            results.append((run_job(job), True))
+        except Exception as err: # pylint: disable=broad-except
+            results.append(((None, "{}: {}".format(type(err).__name__, err)),
+                            False))
+    return results
+
+class ResultCache(object):
+    '''Results stored as `<dir>/<key[:2]>/<key>.json`'''
+    def __init__(self, directory):
+        '''Uses (and creates) `directory`'''
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+
+    def path(self, key):
+        '''Where the result for `key` is stored'''
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        '''The cached `(result, error)` for `key`, or None'''
+        try:
+            with open(self.path(key)) as cache_file:
+                result = tuple(json.load(cache_file))
+        except (OSError, ValueError):
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        '''Stores a result, atomically so readers never see half of it'''
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(handle, "w") as cache_file:
+            json.dump(list(result), cache_file)
+        os.replace(temp_path, path)
+
+def read_jobs(job_file, file_format="jsonl"):
+    '''Yields the job dicts of an open JSON Lines or CSV file'''
+    if file_format == "csv":
+        for row in csv.DictReader(job_file):
+            yield dict((key, value) for key, value in row.items()
+                       if value not in ("", None))
+        return
+    for line in job_file:
+        if line.strip():
+            yield json.loads(line)
+
+def iter_chunks(items, size):
+    '''Yields lists of up to `size` consecutive items'''
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def format_result(job, result):
+    '''The output record for a job'''
+    record = {"type": job.get("type"), "result": result[0],
+              "error": result[1]}
+    if "id" in job:
+        record["id"] = job["id"]
+    return record
+
+def run_batch(jobs, executor=None, max_workers=None, cache=None,
+              chunksize=256, window=64):
+    '''
+    Yields an output record per job, in order. `executor` is None (run
+    here), "process" (a pool of `max_workers`) or any Executor. At most
+    `window` chunks of `chunksize` jobs are in flight, so memory stays
+    bounded. `cache` is an optional ResultCache.
+    '''
+    if executor == "process":
+        with ProcessPoolExecutor(max_workers) as pool:
+            for record in run_batch(jobs, pool, cache=cache,
+                                    chunksize=chunksize, window=window):
+                yield record
+        return
+    pending = deque()
+    for chunk in iter_chunks(jobs, chunksize):
+        pending.append(start_chunk(chunk, executor, cache))
+        while len(pending) > window:
+            for record in finish_chunk(pending.popleft(), cache):
+                yield record
+    while pending:
+        for record in finish_chunk(pending.popleft(), cache):
+            yield record
+
+def start_chunk(chunk, executor, cache):
+    '''
+    Looks a chunk of jobs up in the cache and starts the rest. Returns
+    `(jobs, keys, results, future)`, see `finish_chunk`.
+    '''
+    keys = []
+    results = []
+    todo = []
+    for job in chunk:
+        try:
+            normal = normalize_job(job)
+        except (ValueError, TypeError) as err:
+            keys.append(None)
+            results.append((None, str(err)))
+            continue
+        key = job_key(normal)
+        keys.append(key)
+        result = cache.get(key) if cache is not None else None
+        results.append(result)
+        if result is None:
+            todo.append(normal)
+    future = None
+    if todo:
+        if executor is None:
+            future = run_jobs(todo)
+        else:
+            future = executor.submit(run_jobs, todo)
+    return chunk, keys, results, future
+
+def finish_chunk(started, cache):
+    '''Yields the records of a chunk once its jobs are done'''
+    chunk, keys, results, future = started
+    if future is None:
+        computed = iter(())
+    elif isinstance(future, list):
+        computed = iter(future)
+    else:
+        computed = iter(future.result())
+    for job, key, result in zip(chunk, keys, results):
+        if result is None:
+            result, cacheable = next(computed)
+            if cache is not None and cacheable:
+                cache.put(key, result)
+        yield format_result(job, result)
+
+def main(argv=None):
+    '''Command line entry point'''
+    parser = argparse.ArgumentParser(description="Run a batch of jobs")
+    parser.add_argument("jobs", help="JSON Lines or CSV file, - for stdin")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="default: from the file extension")
+    parser.add_argument("--output", help="default: stdout")
+    parser.add_argument("--workers", type=int,
+                        help="processes to use, 0 to run in this one")
+    parser.add_argument("--cache-dir", help="reuse results stored here")
+    parser.add_argument("--chunksize", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    file_format = args.format or \
+        ("csv" if args.jobs.endswith(".csv") else "jsonl")
+    cache = ResultCache(args.cache_dir) if args.cache_dir else None
+    executor = None if args.workers == 0 else "process"
+    job_file = sys.stdin if args.jobs == "-" else open(args.jobs, newline="")
+    out_file = open(args.output, "w") if args.output else sys.stdout
+    count = 0
+    try:
+        for record in run_batch(read_jobs(job_file, file_format), executor,
+                                args.workers, cache, args.chunksize):
+            out_file.write(json.dumps(record) + "\n")
+            count += 1
+    finally:
+        if job_file is not sys.stdin:
+            job_file.close()
+        if out_file is not sys.stdout:
+            out_file.close()
+    sys.stderr.write("{} jobs, {} from the cache\n".format(
+        count, cache.hits if cache else 0))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+Reproducible benchmarks for the hot paths of BooleanExpr and AddressParser.
+Results are written as JSON so runs from different revisions can be
+compared, e.g.
+
+    python -m src.benchmark --output before.json
+    (check out the new revision)
+    python -m src.benchmark --output after.json --compare before.json
+'''
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from .boolean_expr_parser import COMPILED_EXPS, BooleanExpr
+from .page_address_calc import AddressParser
+
+# Sizes for each benchmark, the quick set is for smoke tests
+FULL_SIZES = {
+    "parse": [100, 1000, 10000, 50000],
+    "row_eval": [4, 8, 12, 16],
+    "bit_sliced": [12, 16, 20, 24],
+    "format": [10, 14, 18, 20],
+    "address": [10, 14, 16, 18],
+    "address_many": [13, 16, 20, 22],
+}
+QUICK_SIZES = {
+    "parse": [100, 1000],
+    "row_eval": [4, 8],
+    "bit_sliced": [8, 12],
+    "format": [6, 10],
+    "address": [6, 10],
+    "address_many": [6, 10],
+}
+# A benchmark this much slower than the baseline counts as a regression
+REGRESSION_THRESHOLD = 1.10
+
+class NullWriter(object):
+    '''A file object that throws away what is written to it'''
+    def write(self, text):
+        '''Discards `text`'''
+        return len(text)
+
+def var_names(count):
+    '''Long variable names for `count` inputs'''
+    return ["in_{}".format(i) for i in range(count)]
+
+def wide_exp(count):
+    '''A sum of products over `count` variables, the shape of our netlists'''
+    names = var_names(count)
+    terms = []
+    for i in range(0, count, 2):
+        pair = names[i:i + 2]
+        terms.append("!" + "*".join(pair) if i % 4 else "*".join(pair))
+    return " + ".join(terms)
+
+def time_best(func, repeat):
+    '''Runs `func` `repeat` times and returns the fastest time in seconds'''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def result(name, size, unit, ops, seconds):
+    '''A single benchmark measurement'''
+    return {
+        "name": name,
+        "size": size,
+        "unit": unit,
+        "ops": ops,
+        "seconds": seconds,
+        "ops_per_sec": ops / seconds if seconds else None,
+    }
+
+def bench_parse(sizes, repeat):
+    '''Parse time against expression length (in variables)'''
+    results = []
+    for size in sizes:
+        exp = wide_exp(size)
+
+        def parse():
+            '''Parses without help from the cache'''
+            COMPILED_EXPS.clear()
+            BooleanExpr(exp, long_names=True)
+        tokens = len(BooleanExpr(exp, long_names=True).post_exp)
+        results.append(result("parse", size, "tokens", tokens,
+                              time_best(parse, repeat)))
+    return results
+
+def bench_row_eval(sizes, repeat):
+    '''Per-row evaluation with the compiled function'''
+    results = []
+    for size in sizes:
+        exp_obj = BooleanExpr(wide_exp(size), long_names=True)
+        names = exp_obj.get_var_list()
+        rows = [dict((name, bool(row >> i & 1))
+                     for i, name in enumerate(names))
+                for row in range(min(1 << size, 4096))]
+
+        def evaluate():
+            '''Evaluates every prepared row'''
+            for dict_bool in rows:
+                exp_obj.evaluate(dict_bool)
+        results.append(result("row_eval", size, "rows", len(rows),
+                              time_best(evaluate, repeat)))
+    return results
+
+def bench_bit_sliced(sizes, repeat):
+    '''Evaluating the whole truth table as packed columns'''
+    results = []
+    for size in sizes:
+        exp_obj = BooleanExpr(wide_exp(size), long_names=True)
+
+        def evaluate():
+            '''Computes the result mask from scratch'''
+            exp_obj.result_mask = None
+            exp_obj.get_result_mask()
+        results.append(result("bit_sliced", size, "rows", 1 << size,
+                              time_best(evaluate, repeat)))
+    return results
+
+def bench_format(sizes, repeat):
+    '''Streaming the ascii table'''
+    results = []
+    for size in sizes:
+        exp_obj = BooleanExpr(wide_exp(size), long_names=True)
+        results.append(result(
+            "format", size, "rows", 1 << size,
+            time_best(lambda: exp_obj.write_truth_table(NullWriter()),
+                      repeat)))
+    return results
+
+def bench_address(sizes, repeat):
+    '''Start and end addresses for every page of a chip'''
+    results = []
+    for size in sizes:
+        chip = AddressParser(size, 12, 2)
+
+        def addresses():
+            '''Every page of the chip'''
+            for page in range(1 << size):
+                chip.get_start_end(page)
+        results.append(result("address", size, "pages", 1 << size,
+                              time_best(addresses, repeat)))
+    return results
+
+def bench_address_many(sizes, repeat):
+    '''Start and end addresses of a whole chip in one batch, as hex'''
+    results = []
+    for size in sizes:
+        chip = AddressParser(size, 12, 2)
+
+        def addresses():
+            '''Every page of the chip'''
+            starts, ends = chip.get_start_end_many(range(1 << size))
+            chip.format_hex_many(starts)
+            chip.format_hex_many(ends)
+        results.append(result("address_many", size, "pages", 1 << size,
+                              time_best(addresses, repeat)))
+    return results
+
+BENCHMARKS = [
+    ("parse", bench_parse),
+    ("row_eval", bench_row_eval),
+    ("bit_sliced", bench_bit_sliced),
+    ("format", bench_format),
+    ("address", bench_address),
+    ("address_many", bench_address_many),
+]
+
+def git_revision():
+    '''The current git commit, or None outside of a checkout'''
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(sizes=None, repeat=3, only=None):
+    '''
+    Runs every benchmark (or those named in `only`) and returns a
+    JSON-serializable report with the environment and the results.
+    '''
+    if sizes is None:
+        sizes = FULL_SIZES
+    results = []
+    for name, bench in BENCHMARKS:
+        if only and name not in only:
+            continue
+        results.extend(bench(sizes[name], repeat))
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare(baseline, report, threshold=REGRESSION_THRESHOLD):
+    '''
+    Compares two reports. Returns a list of `(name, size, ratio)` for the
+    benchmarks that got slower than `threshold` times the baseline.
+    '''
+    before = dict(((res["name"], res["size"]), res["seconds"])
+                  for res in baseline["results"])
+    regressions = []
+    for res in report["results"]:
+        old = before.get((res["name"], res["size"]))
+        if old and res["seconds"] / old > threshold:
+            regressions.append((res["name"], res["size"],
+                                res["seconds"] / old))
+    return regressions
+
+def main(argv=None):
+    '''Command line entry point, returns the exit status'''
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline report to compare with")
+    parser.add_argument("--quick", action="store_true",
+                        help="small sizes, for a smoke test")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", help="benchmarks to run")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(QUICK_SIZES if args.quick else FULL_SIZES,
+                            args.repeat, args.only)
+    for res in report["results"]:
+        print("{:<11} {:>6} {:>14.0f} {}/s".format(
+            res["name"], res["size"], res["ops_per_sec"], res["unit"]))
+    if args.output:
+        with open(args.output, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file), report)
+        for name, size, ratio in regressions:
+            print("REGRESSION {} {}: {:.2f}x slower".format(name, size, ratio))
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
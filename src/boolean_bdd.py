@@ -0,0 +1,301 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+Reduced ordered binary decision diagrams (ROBDDs) for boolean expressions.
+Unlike the truth table, a BDD is usually far smaller than 2 ** n, so
+satisfiability, model counting, equivalence and restriction queries stay
+practical for expressions with hundreds of variables.
+'''
+
+from .boolean_expr_parser import BooleanExpr
+
+# Node ids of the two terminals
+FALSE = 0
+TRUE = 1
+
+def order_variables(exp_objs, heuristic="appearance"):
+    '''
+    Picks a variable order for the expressions in `exp_objs`. A good
+    order keeps the BDD small, the heuristics are:
+      - "appearance": the order variables first show up in the
+        expressions, which keeps related inputs next to each other
+      - "frequency": the most used variables first
+      - "sorted": alphabetical, the column order of the truth table
+    '''
+    counts = {}
+    for exp_obj in exp_objs:
+        for token in exp_obj.post_exp:
+            if token not in exp_obj.boolean_ops:
+                counts[token] = counts.get(token, 0) + 1
+    if heuristic == "appearance":
+        # Dictionaries keep insertion order, which is first appearance
+        return list(counts)
+    if heuristic == "frequency":
+        first_seen = dict((var, i) for i, var in enumerate(counts))
+        return sorted(counts, key=lambda var: (-counts[var], first_seen[var]))
+    if heuristic == "sorted":
+        return sorted(counts)
+    raise ValueError("Unknown variable order heuristic: {}".format(heuristic))
+
+class BDD(object):
+    '''
+    A manager for ROBDD nodes over a fixed variable order. Nodes are
+    plain ints and are hash-consed through a unique table, so two nodes
+    represent the same function exactly when they are the same int.
+
+    To count the inputs that make an expression true, we would do the
+    following:
+    >>> exp_obj = BooleanExpr("A*B + C")
+    >>> bdd = BDD(order_variables([exp_obj]))
+    >>> print(bdd.sat_count(bdd.build(exp_obj)))
+    '''
+    # Variables from the top of the diagram to the bottom
+    var_order = None
+    # Variable -> its level in var_order
+    var_level = None
+    # Node id -> (level, low child, high child), terminals are at the bottom
+    nodes = None
+    # (level, low, high) -> node id, makes every node unique
+    unique = None
+    # Memoized results of `apply` and `negate`
+    apply_memo = None
+    not_memo = None
+
+    # Maps the boolean operators to their `apply` operation
+    op_names = {'*': 'and', '+': 'or', '^': 'xor'}
+
+    def __init__(self, var_order):
+        '''Creates a manager for the variables in `var_order`'''
+        self.var_order = list(var_order)
+        self.var_level = dict((var, i) for i, var in enumerate(var_order))
+        bottom = len(self.var_order)
+        self.nodes = [(bottom, None, None), (bottom, None, None)]
+        self.unique = {}
+        self.apply_memo = {}
+        self.not_memo = {}
+
+    def make_node(self, level, low, high):
+        '''Returns the unique node testing `level`, skipping redundant tests'''
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = node
+        return node
+
+    def var(self, name):
+        '''Returns the node for the function that is just variable `name`'''
+        return self.make_node(self.var_level[name], FALSE, TRUE)
+
+    def negate(self, node):
+        '''Returns the node for NOT `node`'''
+        if node <= TRUE:
+            return TRUE - node
+        result = self.not_memo.get(node)
+        if result is None:
+            level, low, high = self.nodes[node]
+            result = self.make_node(level, self.negate(low),
+                                    self.negate(high))
+            self.not_memo[node] = result
+        return result
+
+    def apply(self, op, one, two):
+        '''
+        Returns the node for `one op two`, where `op` is 'and', 'or' or
+        'xor'. Results are memoized, so shared sub-diagrams are only
+        combined once.
+        '''
+        # Terminal cases
+        if op == 'and':
+            if one == FALSE or two == FALSE:
+                return FALSE
+            if one == TRUE or one == two:
+                return two
+            if two == TRUE:
+                return one
+        elif op == 'or':
+            if one == TRUE or two == TRUE:
+                return TRUE
+            if one == FALSE or one == two:
+                return two
+            if two == FALSE:
+                return one
+        else:
+            if one == two:
+                return FALSE
+            if one == FALSE:
+                return two
+            if two == FALSE:
+                return one
+            if one == TRUE:
+                return self.negate(two)
+            if two == TRUE:
+                return self.negate(one)
+        # All three operations are commutative
+        if one > two:
+            one, two = two, one
+        key = (op, one, two)
+        result = self.apply_memo.get(key)
+        if result is not None:
+            return result
+        level_one, low_one, high_one = self.nodes[one]
+        level_two, low_two, high_two = self.nodes[two]
+        # Split on the variable closest to the top of the order
+        level = min(level_one, level_two)
+        if level_one != level:
+            low_one = high_one = one
+        if level_two != level:
+            low_two = high_two = two
+        result = self.make_node(level,
+                                self.apply(op, low_one, low_two),
+                                self.apply(op, high_one, high_two))
+        self.apply_memo[key] = result
+        return result
+
+    def build(self, exp_obj):
+        '''
+        Builds the node for a parsed BooleanExpr by running its post-fix
+        expression with BDD operations. Every variable of the expression
+        must be in the manager's order.
+        '''
+        if exp_obj.error:
+            raise ValueError(exp_obj.error_msg)
+        post_stack = []
+        for token in exp_obj.post_exp:
+            if token not in exp_obj.boolean_ops:
+                post_stack.append(self.var(token))
+            elif token == '!' or token == '~':
+                post_stack.append(self.negate(post_stack.pop()))
+            else:
+                one = post_stack.pop()
+                two = post_stack.pop()
+                post_stack.append(self.apply(self.op_names[token], two, one))
+        return post_stack.pop()
+
+    def restrict(self, node, var, value, memo=None):
+        '''Returns the node for `node` with variable `var` fixed to `value`'''
+        if memo is None:
+            memo = {}
+        var_level = self.var_level[var]
+        level, low, high = self.nodes[node]
+        if level > var_level:
+            return node
+        if level == var_level:
+            return high if value else low
+        result = memo.get(node)
+        if result is None:
+            result = self.make_node(level,
+                                    self.restrict(low, var, value, memo),
+                                    self.restrict(high, var, value, memo))
+            memo[node] = result
+        return result
+
+    def evaluate(self, node, dict_bool):
+        '''Returns the value of `node` for the variable values in dict_bool'''
+        while node > TRUE:
+            level, low, high = self.nodes[node]
+            node = high if dict_bool[self.var_order[level]] else low
+        return node == TRUE
+
+    def is_sat(self, node):
+        '''True if some input makes `node` true'''
+        return node != FALSE
+
+    def any_sat(self, node):
+        '''
+        Returns a dictionary of variable values that makes `node` true,
+        or None if there is none. Variables left out do not matter.
+        '''
+        if node == FALSE:
+            return None
+        dict_bool = {}
+        while node > TRUE:
+            level, low, high = self.nodes[node]
+            # Only the FALSE terminal is unsatisfiable, every other node is
+            if low != FALSE:
+                dict_bool[self.var_order[level]] = False
+                node = low
+            else:
+                dict_bool[self.var_order[level]] = True
+                node = high
+        return dict_bool
+
+    def sat_count(self, node, var_count=None):
+        '''
+        Returns how many assignments of the first `var_count` variables
+        in the order make `node` true (all of them by default). `node`
+        must not depend on any variable past `var_count`.
+        '''
+        if var_count is None:
+            var_count = len(self.var_order)
+        memo = {}
+
+        def count(node):
+            '''Satisfying assignments of the variables from node's level'''
+            if node <= TRUE:
+                return node
+            if node not in memo:
+                level, low, high = self.nodes[node]
+                memo[node] = \
+                    (count(low) << (self.level_of(low) - level - 1)) + \
+                    (count(high) << (self.level_of(high) - level - 1))
+            return memo[node]
+
+        total = count(node) << self.level_of(node)
+        return total >> (len(self.var_order) - var_count)
+
+    def level_of(self, node):
+        '''The level of a node, terminals are at len(var_order)'''
+        return self.nodes[node][0]
+
+    def size(self, node):
+        '''Returns the number of nodes reachable from `node`'''
+        seen = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            if node > TRUE:
+                stack.append(self.nodes[node][1])
+                stack.append(self.nodes[node][2])
+        return len(seen)
+
+def build_bdds(exps, heuristic="appearance", long_names=False):
+    '''
+    Parses the expression strings in `exps` and builds them in a single
+    manager, so their nodes can be compared. Returns the manager and the
+    list of nodes, in the same order as `exps`.
+    '''
+    exp_objs = [BooleanExpr(exp, long_names) for exp in exps]
+    bdd = BDD(order_variables(exp_objs, heuristic))
+    return bdd, [bdd.build(exp_obj) for exp_obj in exp_objs]
+
+def equivalent(exp_one, exp_two, long_names=False):
+    '''
+    True if the two expression strings compute the same function. Unlike
+    `BooleanExpr.is_equivalent`, variables that do not matter are ignored
+    (`A + !A` is equivalent to `B + !B`).
+    '''
+    _, (one, two) = build_bdds([exp_one, exp_two], long_names=long_names)
+    return one == two
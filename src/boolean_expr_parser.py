@@ -17,6 +17,12 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 -------------------------------------------------------------------------------
 '''
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+import re
+import threading
+
         # TODO: complete documentation
         # TODO: add testing framework
 class BooleanExpr(object):
@@ -26,19 +32,26 @@ class BooleanExpr(object):
     orig_exp = "empty"
     # How the expression will be displayed
     disp_exp = "empty"
-    # Post-fix version of the original expression
-    post_exp = ""
-    # Set of all the variables
-    var_set = set()
-    # Stack needed to verify correctness of expr
-    var_stack = []
-    # Stack to manage operator precedence
-    op_stack = []
+    # Post-fix version of the original expression, as a list of tokens
+    post_exp = ()
+    # Allow multi-character variable names such as `in_17`
+    long_names = False
+    # Set of all the variables (each instance gets its own)
+    var_set = None
+    # Stack to manage operator precedence (each instance gets its own)
+    op_stack = None
     # The formatted truth table to be sent on discord
     result_formatted = ""
-    # Flag and message in case an error occurs
+    # Output column of the truth table packed into an int, bit i is row i
+    result_mask = None
+    # Native function compiled from post_exp, see `compile_postfix`
+    compiled = None
+    # Entry shared with identical expressions in `COMPILED_EXPS`
+    cache_entry = None
+    # Flag, message and 1-based column in case an error occurs
     error = False
     error_msg = ""
+    error_col = None
 
     # Lists all the valid boolean operators
     boolean_ops = ['+', '^', '*', '!', '~']
@@ -55,32 +68,55 @@ class BooleanExpr(object):
         -1  : 10 # op_stack is empty, skip
     }
 
-    def __init__(self, exp):
-        '''Initialize all values'''
-        # Reset some stuff
-        self.var_set.clear()
-        self.op_stack[:] = []
-        self.var_stack[:] = []
+    def __init__(self, exp, long_names=False):
+        '''
+        Initialize all values. With `long_names` a variable is a letter or
+        underscore followed by letters, digits and underscores, otherwise
+        every letter is a variable of its own (so `AB` is an error).
+        '''
+        # All state is per instance, so instances can be used concurrently
+        self.var_set = set()
+        self.op_stack = []
+        self.long_names = long_names
         self.error = False
         self.error_msg = ""
+        self.error_col = None
+        self.result_mask = None
 
         # Process boolean expression, save original
         self.disp_exp = exp
-        # Get rid of whitespace
-        self.orig_exp = "".join(exp.split())
-        self.get_rid_of_double_negation()
-        # Create post-fix expression
-        self.process_exp(self.orig_exp)
+        # Normalize whitespace, long names still need it to separate them
+        if long_names:
+            # Dropping `!!` could join two names, so it is left to parsing
+            self.orig_exp = " ".join(exp.split())
+        else:
+            self.orig_exp = "".join(exp.split())
+            self.get_rid_of_double_negation()
+        # Reuse the parse and compiled function of an identical expression.
+        # Only valid expressions are cached: errors point at a column of
+        # the raw input, which differs between equivalent spellings
+        key = (self.orig_exp, long_names)
+        self.cache_entry = COMPILED_EXPS.get(key)
+        if self.cache_entry is None:
+            # Create post-fix expression, errors point into the raw input
+            self.process_exp(exp)
+            # The function is compiled on first use, see `compile_exp`
+            self.cache_entry = [tuple(self.post_exp), frozenset(self.var_set),
+                                None]
+            if not self.error:
+                COMPILED_EXPS.put(key, self.cache_entry)
+        else:
+            post_exp, var_set, self.compiled = self.cache_entry
+            self.post_exp = list(post_exp)
+            self.var_set = set(var_set)
 
     def get_rid_of_double_negation(self):
         '''
         Remove any two adjacent negation operators. The function
-        name really says it all.
+        name really says it all. Done in a single pass, a run of
+        negations is kept only if it is odd (as its last operator).
         '''
-        self.orig_exp = self.orig_exp.replace('!!', '')
-        self.orig_exp = self.orig_exp.replace('~~', '')
-        self.orig_exp = self.orig_exp.replace('~!', '')
-        self.orig_exp = self.orig_exp.replace('!~', '')
+        self.orig_exp = NEGATION_RUN.sub(cancel_negations, self.orig_exp)
 
 
     ######################################################################
@@ -90,60 +126,116 @@ class BooleanExpr(object):
     def process_exp(self, exp):
         """
         Processes an in-fix expression and saves a post-fix version
-        of the expression on the class level. The post-fix expression
+        of the expression on the instance. The post-fix expression
         is easier to evaluate in code and makes creating the truth
         table more efficient.
+
+        Tokenizing, validation and the conversion (shunting-yard) are
+        all done in one pass over `exp`, so this is linear in its
+        length. On an error, `error_col` is the 1-based column of the
+        offending token in `exp`.
         """
-        # TODO: Split up branching into functions
-        self.post_exp = ""
-        # Step through chars of booelean expression
-        for char in exp:
-            if self.error:
-                return
-            if char == ' ':
+        tokens = LONG_TOKENS if self.long_names else SHORT_TOKENS
+        self.post_exp = []
+        # True while an operand (variable, '(' or negation) is expected
+        expect_var = True
+        # Columns of the start parens still open
+        open_parens = []
+        last = None
+        last_col = 0
+        for match in tokens.finditer(exp):
+            kind = match.lastgroup
+            if kind == 'space':
                 continue
-            # Alphas are variables
-            elif char.isalpha():
-                self.var_set.add(char)
-                self.var_stack.append(char)
-                self.post_exp += char
+            token = match.group()
+            col = match.start() + 1
+            # Variables
+            if kind == 'var':
+                if not expect_var:
+                    return self.set_error(
+                        "Cannot have two variables in a row...", col)
+                self.var_set.add(token)
+                self.post_exp.append(token)
+                expect_var = False
             # Start parens
-            elif char == '(':
-                self.op_stack.append(char)
+            elif token == '(':
+                if not expect_var:
+                    return self.set_error("Missing operator before '('", col)
+                self.op_stack.append(token)
+                open_parens.append(col)
             # End parens
-            elif char == ')':
-                # Process all operators until start paren
+            elif token == ')':
+                if not open_parens:
+                    return self.set_error("Unbalanced paren: )", col)
+                if expect_var:
+                    return self.set_error("Too many operators!", col)
+                # Process all operators until start paren, then pop it
                 while get_top(self.op_stack) != '(':
                     self.process_an_op()
-                    if get_top(self.op_stack) == -1:
-                        self.error = True
-                        self.error_msg = "Unbalanced paren: )"
-                        return
-                # Pop start paren
-                if self.op_stack:
-                    self.op_stack.pop()
-            # If the char is a valid operator then process it
-            elif self.is_valid_op(char):
-                self.process_char(char)
+                self.op_stack.pop()
+                open_parens.pop()
+            # Negation, a prefix operator. Negations cancel in pairs
+            # wherever they are, so only an odd run is an operator
+            elif kind == 'neg':
+                if len("".join(token.split())) % 2 == 0:
+                    continue
+                token = '!'
+                col = match.end()
+                if not expect_var:
+                    if last == ')':
+                        return self.set_error("'!' should not follow a ')'",
+                                              col)
+                    return self.set_error(
+                        "! should come before a variable, not after.", col)
+                self.op_stack.append('!')
+            # If the token is a valid operator then process it
+            elif self.is_valid_op(token):
+                if expect_var:
+                    return self.set_error("Too many operators!", col)
+                self.process_char(token)
+                expect_var = True
             else:
                 # we have found an invalid char
-                self.error = True
-                self.error_msg = "{} is not a valid symbol!".format(char)
-        if self.error:
-            return
+                return self.set_error(
+                    "{} is not a valid symbol!".format(token), col)
+            last = token
+            last_col = col
+        if last is None:
+            return self.set_error("The expression is empty!", 1)
+        if expect_var:
+            return self.set_error("Too many operators!", last_col)
+        if open_parens:
+            return self.set_error("Unbalanced paren: (", open_parens[-1])
         # Process remaining operators
-        while self.op_stack and self.var_stack:
-            if get_top(self.op_stack) == '(':
-                self.error = True
-                self.error_msg = "Unbalanced paren: ("
+        while self.op_stack:
             self.process_an_op()
 
+    def set_error(self, msg, col):
+        '''Flags the expression as invalid because of the token at `col`'''
+        self.error = True
+        self.error_col = col
+        self.error_msg = "{} (column {})".format(msg, col)
+
+    def compile_exp(self):
+        '''
+        Compiles the post-fix expression into a native function, so rows
+        no longer have to be interpreted one character at a time. This
+        happens on first use since compiling huge expressions is slower
+        than parsing them, and the result is shared through the cache.
+        '''
+        if self.compiled is None and not self.error:
+            if self.cache_entry[2] is None:
+                self.cache_entry[2] = compile_postfix(self.post_exp,
+                                                      self.boolean_ops)
+            self.compiled = self.cache_entry[2]
+        return self.compiled
+
     def is_valid_op(self, char):
         '''True if char is a valid boolean operator'''
         return char in self.boolean_ops
 
     def process_char(self, char):
-        '''Processes a single operator'''
+        '''Processes a single binary operator'''
         # Get the precedence of the operator
         prec = self.prec_dict[char]
         # Process all operators with higher precedence
@@ -153,26 +245,8 @@ class BooleanExpr(object):
         self.op_stack.append(char)
 
     def process_an_op(self):
-        '''
-        '''
-        # I don't know if this would happen...
-        if not self.op_stack:
-            self.error = True
-            self.error_msg = "Op stack is empty while trying to process op"
-            return
-        # Add operator to postfix expression
-        temp = get_top(self.op_stack)
-        self.op_stack.pop()
-        self.post_exp += temp
-        # If the operator is unary, then there will be no change in var_stack
-        if temp != '!' and temp != '~':
-            if len(self.var_stack) < 2:
-                self.error = True
-                self.error_msg = "Too many operators!"
-                return
-            self.var_stack.pop()
-            self.var_stack.pop()
-            self.var_stack.append("NUL")
+        '''Moves the operator on top of the op stack to the post-fix expr'''
+        self.post_exp.append(self.op_stack.pop())
 
     ######################################################################
     ####### Process all input permutations using the post-fix expr #######
@@ -181,131 +255,275 @@ class BooleanExpr(object):
     def process_all_exps(self):
         '''
         Process every possible permutation of inputs. Creates the final
-        formatted result by recursively considering every possible
-        combination of True and False for every variable and processing
-        the postfix expression with those inputs.
-        '''
-        self.result_formatted = ""
-        # Get all variables, sort them to ensure consistent tables between runs
-        var_list = []
-        for elem in self.var_set:
-            var_list.append(elem)
-        var_list.sort()
-        var_num = 0
-        # This dictionary will keep track of the value of each variable
-        var_dict = {}
-        self.format_header(var_list)
-
-        # Begin recursion
-        var_dict[var_list[var_num]] = False
-        self.recurse_through_var(var_list, var_dict, var_num + 1)
-        var_dict[var_list[var_num]] = True
-        self.recurse_through_var(var_list, var_dict, var_num + 1)
-
-        # Add bottom line of formatted result
-        self.result_formatted += "+" + "---+" * len(var_list)
-        self.result_formatted += "-" * len(self.disp_exp) + "--+\n"
-
-    def recurse_through_var(self, var_list, var_dict, depth):
-        '''
-        Recurse until every variable has been set to True or False, then
-        once the recursion depth is equal to the number of variables
-        process the expression by passing in the dictionary which is
-        keeping track of the value of each variable
-        '''
-        if depth >= len(self.var_set):
-            # Process expression for a single permutation of input
-            self.process_single_exp(var_dict, var_list)
-        else:
-            # Continue recursion
-            var_dict[var_list[depth]] = False
-            self.recurse_through_var(var_list, var_dict, depth + 1)
-            var_dict[var_list[depth]] = True
-            self.recurse_through_var(var_list, var_dict, depth + 1)
+        formatted result from the rows of `iter_lines`, which evaluates
+        the postfix expression bit-sliced over blocks of the table.
+        '''
+        self.result_formatted = "".join(self.iter_lines())
 
     def process_single_exp(self, dict_bool, var_list):
         '''
         Processes a post-fix expression with the values of each variable
         stroed in `dict_bool`.
         '''
+        # Save result in a formatted fashion, will be single line in table
+        values = [int(bool(dict_bool[var])) for var in var_list]
+        values.append(int(self.evaluate(dict_bool)))
+        self.result_formatted += self.row_template(var_list).format(*values)
+
+    def evaluate(self, dict_bool):
+        '''
+        Returns the result of the expression for the values of each
+        variable stored in `dict_bool`, using the compiled expression.
+        '''
+        return bool(self.compile_exp()(dict_bool))
+
+    ######################################################################
+    ####### Stream the rows of the truth table ###########################
+    ######################################################################
+
+    def format_border(self, var_list):
+        '''The horizontal line of an ascii truth table'''
+        cells = "".join("+" + "-" * (len(var) + 2) for var in var_list)
+        return cells + "+" + "-" * len(self.disp_exp) + "--+\n"
+
+    def format_header(self, var_list, style="ascii"):
+        '''Creates the header to the truth table, in the given style'''
+        if style == "csv":
+            return ",".join(var_list + [self.disp_exp]) + "\n"
+        if style == "markdown":
+            cells = var_list + [self.disp_exp]
+            header = "| " + " | ".join(cells) + " |\n"
+            return header + "".join("|" + "-" * (len(cell) + 2)
+                                    for cell in cells) + "|\n"
+        if style != "ascii":
+            raise ValueError("Unknown table style: {}".format(style))
+        header = "".join("| {} ".format(var) for var in var_list)
+        header += "| {} |\n".format(self.disp_exp)
+        border = self.format_border(var_list)
+        return border + header + border
+
+    def format_footer(self, var_list, style="ascii"):
+        '''Creates the bottom of the truth table, only ascii has one'''
+        if style == "ascii":
+            return self.format_border(var_list)
+        return ""
+
+    def row_cells(self, var_list, style="ascii"):
+        '''
+        Returns the format strings for a single line in the truth table:
+        a list with one cell per variable, and the cell of the result
+        (which ends the line).
+        '''
+        if style == "csv":
+            return ["{}," for var in var_list], "{}\n"
+        if style == "markdown":
+            cells = ["| {} " + " " * (len(var) - 1) for var in var_list]
+            return cells, "| {} " + " " * (len(self.disp_exp) - 1) + "|\n"
+        cells = ["| {} " + " " * (len(var) - 1) for var in var_list]
+        return cells, "| {}" + " " * len(self.disp_exp) + "|\n"
+
+    def row_template(self, var_list, style="ascii"):
+        '''
+        Returns a format string for a single line in the truth table,
+        taking the value of each variable followed by the result.
+        '''
+        cells, result_cell = self.row_cells(var_list, style)
+        return "".join(cells) + result_cell
+
+    def iter_result_blocks(self, block_vars=12):
+        '''
+        Yields `(first_row, block_mask, rows)` for consecutive blocks of
+        the truth table, where bit i of `block_mask` is the result of row
+        `first_row + i`. Each block of 2 ** `block_vars` rows is evaluated
+        bit-sliced (see `iter_block_patterns`), so memory stays bounded no
+        matter how many variables there are.
+        '''
+        if not self.validate():
+            return
+        for first_row, patterns, full in iter_block_patterns(
+                self.get_var_list(), block_vars):
+            yield first_row, self.evaluate_bits(patterns, full), \
+                full.bit_length()
+
+    def iter_rows(self):
+        '''
+        Yields every row of the truth table, in order, as a tuple of the
+        value of each variable (see `get_var_list`) followed by the result.
+        '''
+        var_list = self.get_var_list()
+        low_rows = None
+        for first_row, block_mask, rows in self.iter_result_blocks():
+            if low_rows is None:
+                low_num = rows.bit_length() - 1
+                high_num = len(var_list) - low_num
+                low_rows = [row_bits(row, low_num) for row in range(rows)]
+            high = row_bits(first_row >> low_num, high_num)
+            # Results of the block, least significant bit (first row) first
+            results = format(block_mask, "0{}b".format(rows))[::-1]
+            for low, result in zip(low_rows, results):
+                yield high + low + (int(result),)
+
+    def iter_lines(self, style="ascii"):
+        '''
+        Yields the formatted truth table in pieces: the header, then one
+        line per row, then the footer. Nothing is yielded if invalid.
+        '''
+        if not self.validate():
+            return
+        var_list = self.get_var_list()
+        cells, result_cell = self.row_cells(var_list, style)
+        results = [result_cell.format(0), result_cell.format(1)]
+        yield self.format_header(var_list, style)
+        low_lines = None
+        for first_row, block_mask, rows in self.iter_result_blocks():
+            if low_lines is None:
+                # Every block shares the cells of the trailing variables
+                low_num = rows.bit_length() - 1
+                high_num = len(var_list) - low_num
+                low_cells = cells[high_num:]
+                low_lines = [fill_cells(low_cells, row_bits(row, low_num))
+                             for row in range(rows)]
+            high = fill_cells(cells, row_bits(first_row >> low_num, high_num))
+            bits = format(block_mask, "0{}b".format(rows))[::-1]
+            for low, result in zip(low_lines, bits):
+                yield high + low + results[result == "1"]
+        yield self.format_footer(var_list, style)
+
+    def write_truth_table(self, file_obj, style="ascii", chunk_rows=4096):
+        '''
+        Streams the truth table to `file_obj` as an ascii table, "csv" or
+        "markdown", writing `chunk_rows` lines at a time. Memory use does
+        not grow with the table. Returns False if the expression is invalid.
+        '''
+        if not self.validate():
+            return False
+        chunk = []
+        for line in self.iter_lines(style):
+            chunk.append(line)
+            if len(chunk) >= chunk_rows:
+                file_obj.write("".join(chunk))
+                chunk = []
+        file_obj.write("".join(chunk))
+        return True
+
+    ######################################################################
+    ####### Bit-sliced evaluation of the whole truth table ###############
+    ######################################################################
+
+    def get_var_list(self):
+        '''
+        Returns the variables in sorted order, which is the column order
+        of the truth table.
+        '''
+        return sorted(self.var_set)
+
+    def get_var_patterns(self, var_list):
+        '''
+        Packs the column of every variable in the truth table into an int,
+        see `var_patterns`.
+        '''
+        return var_patterns(var_list)
+
+    def evaluate_bits(self, patterns, full):
+        '''
+        Runs the post-fix expression a single time over packed columns,
+        so every operator is one bitwise operation over the whole table.
+        `patterns` maps each variable to its column and `full` has a bit
+        set for every row (needed to negate a column).
+        '''
         post_stack = []
         for char in self.post_exp:
-            if char.isalpha():
-                # Append value of that variable to the stack
-                post_stack.append(dict_bool[char])
-            elif char in self.prec_dict:
-                # Compute result and add it back to stack
-                if char == '!' or char == '~':
-                    one = not post_stack.pop()
-                    post_stack.append(one)
+            if char not in self.boolean_ops:
+                post_stack.append(patterns[char])
+            elif char == '!' or char == '~':
+                post_stack.append(post_stack.pop() ^ full)
+            else:
+                one = post_stack.pop()
+                two = post_stack.pop()
                 if char == '*':
-                    one = post_stack.pop()
-                    two = post_stack.pop()
-                    result = one and two
-                    post_stack.append(result)
-                if char == '+':
-                    one = post_stack.pop()
-                    two = post_stack.pop()
-                    result = one or two
-                    post_stack.append(result)
-                if char == '^':
-                    one = post_stack.pop()
-                    two = post_stack.pop()
-                    result = bool(one) ^ bool(two)
-                    post_stack.append(result)
-        # Save result in a formatted fashion, will be single line in table
-        self.format_result(post_stack.pop(), dict_bool, var_list)
-
-    def format_header(self, var_list):
-        '''Creates the header to the truth table'''
-        self.result_formatted += "+" + "---+" * len(var_list)
-        self.result_formatted += "-" * len(self.disp_exp) + "--+\n"
-        for var in var_list:
-            self.result_formatted += "| {} ".format(var)
-        self.result_formatted += "| {} |\n".format(self.disp_exp)
-        self.result_formatted += "+---" * len(var_list)
-        self.result_formatted += "+" + "-" * len(self.disp_exp) + "--+\n"
-
-    def format_result(self, result, dict_bool, var_list):
-        '''Creates single line in the truth table'''
-        for var in var_list:
-            booly = int(dict_bool[var])
-            self.result_formatted += "| {} ".format(booly)
-        res = int(result)
-        self.result_formatted += "| {}".format(res)
-        self.result_formatted += " " * len(self.disp_exp) + "|\n"
-
-    def valid_vars(self):
-        '''False if there are two vars right next to each other'''
-        for i in range(1, len(self.orig_exp)):
-            if self.orig_exp[i].isalpha() and self.orig_exp[i - 1].isalpha():
-                return False
-        return True
+                    post_stack.append(one & two)
+                elif char == '+':
+                    post_stack.append(one | two)
+                else:
+                    post_stack.append(one ^ two)
+        return post_stack.pop()
+
+    def get_result_mask(self):
+        '''
+        Returns the output column of the truth table as an int, where bit
+        `i` is the result for row `i`. Returns None if the expression is
+        invalid (see `error_msg`). The mask is computed once and reused.
+        '''
+        if self.result_mask is not None:
+            return self.result_mask
+        if not self.validate():
+            return None
+        var_list = self.get_var_list()
+        full = (1 << (1 << len(var_list))) - 1
+        self.result_mask = self.evaluate_bits(
+            self.get_var_patterns(var_list), full)
+        return self.result_mask
+
+    def get_row_result(self, dict_bool):
+        '''
+        Looks up the result for the input values in `dict_bool` from the
+        result mask, rather than evaluating the expression again. Returns
+        None if the expression is invalid.
+        '''
+        result_mask = self.get_result_mask()
+        if result_mask is None:
+            return None
+        row = 0
+        for var in self.get_var_list():
+            row = (row << 1) | int(bool(dict_bool[var]))
+        return bool(result_mask >> row & 1)
+
+    def count_true(self):
+        '''
+        Returns how many rows of the truth table evaluate to True, or None
+        if the expression is invalid.
+        '''
+        result_mask = self.get_result_mask()
+        if result_mask is None:
+            return None
+        return popcount(result_mask)
 
-    def valid_negation(self):
-        '''False if operator! is placed incorrectly'''
-        not_list = ['!', '~']
-        for i in range(1, len(self.orig_exp)):
-            if self.orig_exp[i] in not_list and self.orig_exp[i - 1].isalpha():
-                self.error_msg = "! should come before a variable, not after."
-                return False
-            if self.orig_exp[i] in not_list and self.orig_exp[i - 1] == ')':
-                self.error_msg = "'!' should not follow a ')'"
-                return False
-        return True
+    def get_signature(self):
+        '''
+        Returns a canonical signature of the function the expression
+        computes: a tuple of the sorted variables and the result mask.
+        Two expressions over the same variables are equivalent exactly
+        when their signatures are equal. Returns None if invalid.
+        '''
+        result_mask = self.get_result_mask()
+        if result_mask is None:
+            return None
+        return (tuple(self.get_var_list()), result_mask)
+
+    def is_equivalent(self, other):
+        '''True if `other` computes the same function over the same vars'''
+        signature = self.get_signature()
+        return signature is not None and signature == other.get_signature()
+
+    def validate(self):
+        '''
+        Returns False if the expression is invalid, the reason is in
+        `error_msg`. All syntax checks are done while parsing.
+        '''
+        return not self.error
 
-    def get_truth_table(self):
-        '''Returns formatted version of the truth table for a boolean expr'''
-        if not self.valid_vars():
-            self.error = True
-            self.error_msg = "Cannot have two variables in a row..."
-        if not self.valid_negation():
-            self.error = True
-        if self.error:
+    def get_truth_table(self, max_vars=5):
+        '''
+        Returns formatted version of the truth table for a boolean expr.
+        Expressions with more than `max_vars` variables are refused since
+        the table would be huge, pass None to always format the table.
+        '''
+        if not self.validate():
             return "The expression: {}, is invalid!\n{}".format(self.disp_exp,
                                                                 self.error_msg)
-        if len(set(self.var_set)) > 5:
-            return "Too many variables! Will result in spam..."
+        if max_vars is not None and len(self.var_set) > max_vars:
+            # Only the table is refused, the expression is still valid
+            return TOO_MANY_VARS
         # print("Variable set: {}".format(self.var_set))
         # # print(self.op_stack)
         # print("\nIn-fix:   {}".format(self.orig_exp))
@@ -313,6 +531,214 @@ class BooleanExpr(object):
         self.process_all_exps()
         return self.result_formatted
 
+class LRUCache(object):
+    '''
+    A small thread-safe least-recently-used cache. Once `maxsize` entries
+    are stored, putting a new key evicts the entry used longest ago.
+    '''
+    def __init__(self, maxsize):
+        '''Creates an empty cache holding at most `maxsize` entries'''
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        '''Returns the value for `key` and marks it as recently used'''
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        '''Stores `value` under `key`, evicting the oldest entry if full'''
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        '''Empties the cache and resets the hit counters'''
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+# Returned by `get_truth_table` instead of a table that would be huge
+TOO_MANY_VARS = "Too many variables! Will result in spam..."
+
+# Parsed and compiled expressions, keyed by the normalized expression
+COMPILED_EXPS = LRUCache(1024)
+
+# Splits an expression into whitespace, negations, variables and symbols.
+# Short variables are a single letter, long ones are identifiers like `in_17`.
+# A run of negations (even with whitespace between them) is one token
+SHORT_TOKENS = re.compile(r"(?P<space>\s+)|(?P<neg>[!~](?:\s*[!~])*)"
+                          r"|(?P<var>[^\W\d_])|(?P<sym>.)")
+LONG_TOKENS = re.compile(r"(?P<space>\s+)|(?P<neg>[!~](?:\s*[!~])*)"
+                         r"|(?P<var>[^\W\d]\w*)|(?P<sym>.)")
+# A run of adjacent negation operators
+NEGATION_RUN = re.compile(r"[!~]{2,}")
+
+def cancel_negations(match):
+    '''Replaces a run of negations with its last one if the run is odd'''
+    run = match.group()
+    return run[-1] if len(run) % 2 else ""
+
+def compile_postfix(post_exp, boolean_ops):
+    '''
+    Turns a post-fix expression into a Python function that takes a
+    dictionary of variable values and returns the result. The generated
+    source is straight-line code with one temporary per operator, e.g.
+    `AC+!` becomes:
+
+        def compiled(v):
+            t0 = v['A'] or v['C']
+            t1 = not t0
+            return t1
+
+    Raises IndexError if an operator does not have enough operands.
+    '''
+    lines = ["def compiled(v):"]
+    post_stack = []
+    for char in post_exp:
+        if char not in boolean_ops:
+            post_stack.append("v[{!r}]".format(char))
+            continue
+        temp = "t{}".format(len(lines) - 1)
+        if char == '!' or char == '~':
+            code = "not {}".format(post_stack.pop())
+        else:
+            one = post_stack.pop()
+            two = post_stack.pop()
+            if char == '*':
+                code = "{} and {}".format(two, one)
+            elif char == '+':
+                code = "{} or {}".format(two, one)
+            else:
+                code = "bool({}) ^ bool({})".format(two, one)
+        lines.append("    {} = {}".format(temp, code))
+        post_stack.append(temp)
+    lines.append("    return {}".format(post_stack.pop()))
+    namespace = {}
+    exec(compile("\n".join(lines), "<BooleanExpr>", "exec"), namespace)
+    return namespace["compiled"]
+
+def build_truth_table(exp, max_vars=5, long_names=False):
+    '''
+    Like `truth_table_job`, but unexpected exceptions are raised rather
+    than turned into an error message, so callers can tell a bad
+    expression from a failure.
+    '''
+    exp_obj = BooleanExpr(exp, long_names)
+    if exp_obj.error:
+        return (None, exp_obj.error_msg)
+    if max_vars is not None and len(exp_obj.var_set) > max_vars:
+        return (None, TOO_MANY_VARS)
+    return (exp_obj.get_truth_table(max_vars), None)
+
+def truth_table_job(exp, max_vars=5, long_names=False):
+    '''
+    Builds the truth table for a single expression. Returns a tuple of
+    `(table, None)` on success or `(None, error_msg)` if the expression
+    could not be turned into a table.
+    '''
+    try:
+        return build_truth_table(exp, max_vars, long_names)
+    except Exception as err: # pylint: disable=broad-except
+        return (None, "{}: {}".format(type(err).__name__, err))
+
+def evaluate_batch(exps, executor=None, max_workers=None, max_vars=5,
+                   chunksize=64, long_names=False):
+    '''
+    Builds the truth tables of many expressions, returning a list with
+    a `(table, error_msg)` tuple per expression (see `truth_table_job`)
+    in the same order as `exps`. `long_names` applies to every one.
+
+    `executor` picks how the work is run: None runs it in this thread,
+    "thread" or "process" creates a pool of `max_workers` workers, and
+    any `concurrent.futures.Executor` is used as is (and left open).
+    Since evaluation is CPU-bound, "process" is the one that scales
+    across all cores.
+    '''
+    exps = list(exps)
+    if executor is None:
+        return [truth_table_job(exp, max_vars, long_names) for exp in exps]
+    if executor == "thread":
+        with ThreadPoolExecutor(max_workers) as pool:
+            return evaluate_batch(exps, pool, max_vars=max_vars,
+                                  chunksize=chunksize, long_names=long_names)
+    if executor == "process":
+        with ProcessPoolExecutor(max_workers) as pool:
+            return evaluate_batch(exps, pool, max_vars=max_vars,
+                                  chunksize=chunksize, long_names=long_names)
+    return list(executor.map(truth_table_job, exps, repeat(max_vars),
+                             repeat(long_names), chunksize=chunksize))
+
+def var_patterns(var_list):
+    '''
+    Packs the column of every variable in the truth table into an int.
+    Bit `i` of a pattern is the value of that variable in row `i`, and
+    the first variable in `var_list` is the most significant bit of
+    the row number (the same order truth tables are printed in).
+    '''
+    rows = 1 << len(var_list)
+    patterns = {}
+    for depth, var in enumerate(var_list):
+        block = 1 << (len(var_list) - 1 - depth)
+        # A single period of the column: `block` zeros then `block` ones
+        pattern = ((1 << block) - 1) << block
+        width = block * 2
+        # Double the pattern until it covers every row
+        while width < rows:
+            pattern |= pattern << width
+            width *= 2
+        patterns[var] = pattern
+    return patterns
+
+def iter_block_patterns(var_list, block_vars=12):
+    '''
+    Splits the truth table over `var_list` into blocks of 2 ** `block_vars`
+    consecutive rows and yields `(first_row, patterns, full)` for each,
+    where `patterns` are the packed variable columns within the block
+    (the leading variables are constant, all 0 or all 1) and `full` has a
+    bit set for every row of the block. The same `patterns` dictionary
+    is updated in place for every block.
+    '''
+    low_num = min(len(var_list), block_vars)
+    high_vars = var_list[:len(var_list) - low_num]
+    rows = 1 << low_num
+    full = (1 << rows) - 1
+    patterns = var_patterns(var_list[len(high_vars):])
+    for block in range(1 << len(high_vars)):
+        for depth, var in enumerate(high_vars):
+            high_bit = block >> (len(high_vars) - 1 - depth) & 1
+            patterns[var] = full if high_bit else 0
+        yield block * rows, patterns, full
+
+def popcount(num):
+    '''Number of set bits in `num`'''
+    return bin(num).count('1')
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+
+def row_bits(row, var_num):
+    '''The bits of a row number, most significant first, as a tuple'''
+    return tuple(row >> shift & 1 for shift in range(var_num - 1, -1, -1))
+
+def fill_cells(cells, bits):
+    '''Formats each bit into its cell of a truth-table line'''
+    return "".join(cell.format(bit) for cell, bit in zip(cells, bits))
+
 def get_top(arr):
     '''
     If there are elements in the stack, return the top of the stack,
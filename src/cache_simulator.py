@@ -0,0 +1,265 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+A set-associative cache simulator. CacheGeometry splits addresses into
+tag, index and block-offset bits the way AddressParser splits them into
+page, offset and byte-select bits. CacheLevels can be chained into a
+hierarchy, each with its own associativity, replacement ("lru", "fifo"
+or "random"), write-back or write-through, and write-allocate policies.
+
+The state of a level is kept in flat arrays with a slot per line (set
+`s` uses slots `s * ways` to `s * ways + ways - 1`) rather than an object
+per line, so a 1 MiB cache of 64 byte lines needs a few hundred KiB.
+'''
+from array import array
+import random
+
+from .address_trace import CHUNK_BYTES, decode_trace
+from .page_address_calc import AddressParser
+
+# Tag of an empty line
+EMPTY = -1
+
+def log2_exact(num, what):
+    '''The log base 2 of `num`, which must be a power of two'''
+    if num < 1 or num & (num - 1):
+        raise ValueError("{} must be a power of two".format(what))
+    return num.bit_length() - 1
+
+class CacheGeometry(AddressParser):
+    '''
+    The address split of a cache: `tag` bits, then `index` bits picking
+    the set, then `block` bits picking the byte within a line. Decoding
+    an address gives `(tag, index, block_offset)`, and the hex formatting
+    is the same as AddressParser's.
+    >>> geo = CacheGeometry.from_size(32768, 64, 8)
+    >>> geo.decode_address(0x12345678)
+    '''
+    def __init__(self, tag, index, block):
+        '''Initializes the geometry, obviously'''
+        super(CacheGeometry, self).__init__(tag, index, block)
+        self.tag_bits = tag
+        self.index_bits = index
+        self.block_bits = block
+        self.sets = 1 << index
+        self.block_bytes = 1 << block
+
+    @classmethod
+    def from_size(cls, cache_bytes, block_bytes, ways, address_bits=32):
+        '''
+        The geometry of a cache holding `cache_bytes` in lines of
+        `block_bytes`, `ways` lines per set, for `address_bits` addresses.
+        '''
+        block = log2_exact(block_bytes, "Block size")
+        index = log2_exact(cache_bytes // (block_bytes * ways), "Set count")
+        if block + index > address_bits:
+            raise ValueError("Cache is larger than the address space")
+        return cls(address_bits - index - block, index, block)
+
+    def get_block_start_end(self, address):
+        '''The first and last address of the line holding `address`'''
+        start = address >> self.block_bits << self.block_bits
+        return [self.format_hex(start),
+                self.format_hex(start | (self.block_bytes - 1))]
+
+class CacheLevel(object):
+    '''
+    One level of cache of the given CacheGeometry and `ways`. Misses,
+    write-throughs and write-backs go to `next_level`, or are counted as
+    memory traffic if there is none.
+    '''
+    def __init__(self, geometry, ways, policy="lru", write_back=True,
+                 write_allocate=True, next_level=None, seed=0):
+        '''Starts with every line empty'''
+        if policy not in ("lru", "fifo", "random"):
+            raise ValueError("Unknown replacement policy: {}".format(policy))
+        self.geometry = geometry
+        self.ways = ways
+        self.policy = policy
+        self.write_back = write_back
+        self.write_allocate = write_allocate
+        self.next_level = next_level
+        self.rng = random.Random(seed)
+        self.block_bits = geometry.block_bits
+        self.index_bits = geometry.index_bits
+        self.index_mask = geometry.sets - 1
+        self.lru = policy == "lru"
+        lines = geometry.sets * ways
+        self.tags = array('q', [EMPTY]) * lines
+        # When each line was last used (lru) or filled (fifo)
+        self.stamps = array('Q', [0]) * lines
+        self.dirty = bytearray(lines)
+        self.clock = 0
+        self.reads = 0
+        self.writes = 0
+        self.read_hits = 0
+        self.write_hits = 0
+        self.writebacks = 0
+        self.memory_reads = 0
+        self.memory_writes = 0
+
+    def send_down(self, address, is_write):
+        '''Passes an access on to the next level, or memory'''
+        if self.next_level is not None:
+            self.next_level.access(address, is_write)
+        elif is_write:
+            self.memory_writes += 1
+        else:
+            self.memory_reads += 1
+
+    def pick_victim(self, base):
+        '''The slot to fill in the set starting at slot `base`'''
+        tags = self.tags[base:base + self.ways]
+        if EMPTY in tags:
+            return base + tags.index(EMPTY)
+        if self.policy == "random":
+            return base + self.rng.randrange(self.ways)
+        stamps = self.stamps[base:base + self.ways]
+        return base + stamps.index(min(stamps))
+
+    def access(self, address, is_write=False):
+        '''Simulates a read or write of `address`, returns True on a hit'''
+        block = address >> self.block_bits
+        index = block & self.index_mask
+        tag = block >> self.index_bits
+        base = index * self.ways
+        self.clock += 1
+        if is_write:
+            self.writes += 1
+        else:
+            self.reads += 1
+        ways = self.tags[base:base + self.ways]
+        if tag in ways:
+            slot = base + ways.index(tag)
+            if self.lru:
+                self.stamps[slot] = self.clock
+            if is_write:
+                self.write_hits += 1
+                if self.write_back:
+                    self.dirty[slot] = 1
+                else:
+                    self.send_down(address, True)
+            else:
+                self.read_hits += 1
+            return True
+        if is_write and not self.write_allocate:
+            self.send_down(address, True)
+            return False
+        self.send_down(address, False)
+        slot = self.pick_victim(base)
+        if self.dirty[slot]:
+            self.writebacks += 1
+            victim = (self.tags[slot] << self.index_bits | index) \
+                << self.block_bits
+            self.send_down(victim, True)
+        self.tags[slot] = tag
+        self.stamps[slot] = self.clock
+        self.dirty[slot] = is_write and self.write_back
+        if is_write and not self.write_back:
+            self.send_down(address, True)
+        return False
+
+    def flush(self):
+        '''Writes back every dirty line and empties the cache'''
+        for slot, tag in enumerate(self.tags):
+            if tag != EMPTY and self.dirty[slot]:
+                self.writebacks += 1
+                index = slot // self.ways
+                self.send_down((tag << self.index_bits | index)
+                               << self.block_bits, True)
+        lines = len(self.tags)
+        self.tags = array('q', [EMPTY]) * lines
+        self.dirty = bytearray(lines)
+
+    def get_stats(self):
+        '''The counts of this level as a dict'''
+        accesses = self.reads + self.writes
+        hits = self.read_hits + self.write_hits
+        return {
+            "reads": self.reads,
+            "writes": self.writes,
+            "read_hits": self.read_hits,
+            "write_hits": self.write_hits,
+            "misses": accesses - hits,
+            "writebacks": self.writebacks,
+            "hit_rate": hits / accesses if accesses else 0.0,
+            "memory_reads": self.memory_reads,
+            "memory_writes": self.memory_writes,
+        }
+
+class CacheSimulator(object):
+    '''
+    A cache hierarchy built from `levels`, a list of dicts of CacheLevel
+    arguments (with a `size`, `block` and `ways` instead of a geometry),
+    L1 first. For example, a 32 KiB L1 over a 1 MiB L2,
+    >>> sim = CacheSimulator([
+    ...     {"size": 32768, "block": 64, "ways": 8},
+    ...     {"size": 1 << 20, "block": 64, "ways": 16}])
+    '''
+    def __init__(self, levels, address_bits=32):
+        '''Builds the levels, last level first so each knows the next'''
+        self.levels = []
+        next_level = None
+        for config in reversed(levels):
+            config = dict(config)
+            geometry = CacheGeometry.from_size(
+                config.pop("size"), config.pop("block"), config["ways"],
+                address_bits)
+            next_level = CacheLevel(geometry, next_level=next_level,
+                                    **config)
+            self.levels.insert(0, next_level)
+        self.address_bits = address_bits
+
+    def access(self, address, is_write=False):
+        '''Simulates one access, returns True if it hit in L1'''
+        return self.levels[0].access(address, is_write)
+
+    def run(self, accesses):
+        '''
+        Simulates an iterable of addresses (reads) or `(address,
+        is_write)` tuples, returns `get_stats`.
+        '''
+        access = self.levels[0].access
+        for item in accesses:
+            if isinstance(item, tuple):
+                access(*item)
+            else:
+                access(item)
+        return self.get_stats()
+
+    def run_trace(self, path, binary=False, word_bytes=4,
+                  chunk_bytes=CHUNK_BYTES):
+        '''
+        Streams the read addresses of a trace file (see `address_trace`)
+        through the hierarchy, returns `get_stats`.
+        '''
+        access = self.levels[0].access
+        chip = self.levels[0].geometry
+        for _, addresses, _, _, _, invalid in decode_trace(
+                path, chip, binary, word_bytes, chunk_bytes):
+            if len(invalid):
+                raise ValueError("Address wider than {} bits".format(
+                    self.address_bits))
+            for address in addresses:
+                access(int(address))
+        return self.get_stats()
+
+    def get_stats(self):
+        '''The stats of each level, L1 first'''
+        return [level.get_stats() for level in self.levels]
@@ -0,0 +1,270 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+A hash-consed expression DAG built from the post-fix form of one or more
+boolean expressions. Identical sub-expressions become a single node, and
+every node knows which variables it depends on, so when one input flips
+only the nodes that depend on it are evaluated again.
+'''
+
+from .boolean_expr_parser import BooleanExpr
+
+class ExprDag(object):
+    '''
+    Nodes are ints in topological order (children before parents). A node
+    is either a variable or an operator ('!', '*', '+' or '^') over one or
+    two child nodes. To visit the rows of a truth table in Gray-code order,
+    so consecutive rows differ in a single input, we would do:
+    >>> dag = ExprDag()
+    >>> root = dag.add(BooleanExpr("A*B + !A*C"))
+    >>> for row, (value,) in dag.iter_gray():
+    ...     print(row, value)
+    '''
+    # Node id -> operator, or None for a variable
+    ops = None
+    # Node id -> first child, or the variable name for a variable
+    lefts = None
+    # Node id -> second child, or None for variables and negations
+    rights = None
+    # Node id -> bitmask of the variables (by var_ids) it depends on
+    deps = None
+    # (op, left, right) -> node id, so each sub-expression is stored once
+    node_ids = None
+    # Variable name -> its index in the dependency bitmasks
+    var_ids = None
+    # Nodes of the expressions added, in the order they were added
+    roots = None
+
+    def __init__(self):
+        '''Creates an empty DAG'''
+        self.ops = []
+        self.lefts = []
+        self.rights = []
+        self.deps = []
+        self.node_ids = {}
+        self.var_ids = {}
+        self.roots = []
+
+    def __len__(self):
+        return len(self.ops)
+
+    def make_node(self, op, left, right=None):
+        '''Returns the node for `op` over its children, creating it once'''
+        if op == '!' and self.ops[left] == '!':
+            # Double negation
+            return self.lefts[left]
+        if op != '!' and left > right:
+            # AND, OR and XOR are commutative
+            left, right = right, left
+        key = (op, left, right)
+        node = self.node_ids.get(key)
+        if node is None:
+            node = len(self.ops)
+            self.ops.append(op)
+            self.lefts.append(left)
+            self.rights.append(right)
+            deps = self.deps[left]
+            if right is not None:
+                deps |= self.deps[right]
+            self.deps.append(deps)
+            self.node_ids[key] = node
+        return node
+
+    def var(self, name):
+        '''Returns the node for variable `name`'''
+        key = (None, name, None)
+        node = self.node_ids.get(key)
+        if node is None:
+            node = len(self.ops)
+            var_id = len(self.var_ids)
+            self.var_ids[name] = var_id
+            self.ops.append(None)
+            self.lefts.append(name)
+            self.rights.append(None)
+            self.deps.append(1 << var_id)
+            self.node_ids[key] = node
+        return node
+
+    def add(self, exp_obj):
+        '''
+        Adds a parsed BooleanExpr to the DAG and returns its root node.
+        Sub-expressions already in the DAG are reused.
+        '''
+        if exp_obj.error:
+            raise ValueError(exp_obj.error_msg)
+        post_stack = []
+        for token in exp_obj.post_exp:
+            if token not in exp_obj.boolean_ops:
+                post_stack.append(self.var(token))
+            elif token == '!' or token == '~':
+                post_stack.append(self.make_node('!', post_stack.pop()))
+            else:
+                one = post_stack.pop()
+                two = post_stack.pop()
+                post_stack.append(self.make_node(token, two, one))
+        root = post_stack.pop()
+        self.roots.append(root)
+        return root
+
+    def get_var_list(self):
+        '''Returns the variables in sorted order, the truth-table columns'''
+        return sorted(self.var_ids)
+
+    def dependents(self):
+        '''
+        Returns a dictionary mapping each variable to the operator nodes
+        that depend on it, in topological order. These are the only nodes
+        to evaluate again when that variable changes.
+        '''
+        affected = dict((name, []) for name in self.var_ids)
+        names = sorted(self.var_ids, key=self.var_ids.get)
+        for node, op in enumerate(self.ops):
+            if op is None:
+                continue
+            deps = self.deps[node]
+            var_id = 0
+            while deps:
+                if deps & 1:
+                    affected[names[var_id]].append(node)
+                deps >>= 1
+                var_id += 1
+        return affected
+
+    def evaluate_node(self, node, values):
+        '''Computes the value of an operator node from its children'''
+        op = self.ops[node]
+        if op == '!':
+            return not values[self.lefts[node]]
+        one = values[self.lefts[node]]
+        two = values[self.rights[node]]
+        if op == '*':
+            return one and two
+        if op == '+':
+            return one or two
+        return one != two
+
+    def evaluate(self, dict_bool):
+        '''
+        Evaluates every node once for the variable values in `dict_bool`.
+        Returns the list of node values, index it with the roots.
+        '''
+        values = [False] * len(self.ops)
+        for node, op in enumerate(self.ops):
+            if op is None:
+                values[node] = bool(dict_bool[self.lefts[node]])
+            else:
+                values[node] = self.evaluate_node(node, values)
+        return values
+
+    def evaluate_bits(self, patterns, full):
+        '''
+        Evaluates every node once over packed columns (see
+        `boolean_expr_parser.var_patterns`), so each operator is a single
+        bitwise op over the whole table. Returns the list of node masks.
+        '''
+        values = [0] * len(self.ops)
+        lefts = self.lefts
+        rights = self.rights
+        for node, op in enumerate(self.ops):
+            if op is None:
+                values[node] = patterns[lefts[node]]
+            elif op == '!':
+                values[node] = values[lefts[node]] ^ full
+            elif op == '*':
+                values[node] = values[lefts[node]] & values[rights[node]]
+            elif op == '+':
+                values[node] = values[lefts[node]] | values[rights[node]]
+            else:
+                values[node] = values[lefts[node]] ^ values[rights[node]]
+        return values
+
+    def iter_gray(self, roots=None):
+        '''
+        Yields `(row, results)` for every row of the truth table, where
+        `results` holds the value of each root in `roots` (all roots by
+        default) and `row` is the row number in the usual table order.
+
+        Rows are visited in Gray-code order, so each step flips a single
+        input and only the nodes depending on it are evaluated again.
+        The variables with the fewest dependents flip most often.
+        '''
+        if roots is None:
+            roots = self.roots
+        var_list = self.get_var_list()
+        var_num = len(var_list)
+        affected = self.dependents()
+        # Gray-code bit i flips flip_order[i], cheapest variables first
+        flip_order = sorted(var_list, key=lambda var: len(affected[var]))
+        flip_nodes = [self.var(var) for var in flip_order]
+        # (node, op, left, right) to evaluate again, with 0/1 values
+        flip_affected = [[(node, self.ops[node], self.lefts[node],
+                           self.rights[node]) for node in affected[var]]
+                         for var in flip_order]
+        # The bit of each variable in the row number
+        flip_rows = [1 << (var_num - 1 - var_list.index(var))
+                     for var in flip_order]
+
+        values = [int(value) for value in
+                  self.evaluate(dict.fromkeys(var_list, False))]
+        row = 0
+        yield row, tuple(values[root] == 1 for root in roots)
+        for step in range(1, 1 << var_num):
+            # The Gray code changes in the lowest set bit of the step
+            bit = (step & -step).bit_length() - 1
+            values[flip_nodes[bit]] ^= 1
+            row ^= flip_rows[bit]
+            for node, op, left, right in flip_affected[bit]:
+                if op == '*':
+                    values[node] = values[left] & values[right]
+                elif op == '+':
+                    values[node] = values[left] | values[right]
+                elif op == '^':
+                    values[node] = values[left] ^ values[right]
+                else:
+                    values[node] = values[left] ^ 1
+            yield row, tuple(values[root] == 1 for root in roots)
+
+    def get_result_masks(self, roots=None):
+        '''
+        Returns the output column of each root as a result mask (bit i is
+        row i, like `BooleanExpr.get_result_mask`), using `iter_gray`.
+        '''
+        if roots is None:
+            roots = self.roots
+        # Rows arrive out of order, so the bits are set in a bytearray
+        # (bit i of byte j is row 8 * j + i) and turned into an int once
+        size = ((1 << len(self.get_var_list())) + 7) // 8
+        columns = [bytearray(size) for _ in roots]
+        for row, results in self.iter_gray(roots):
+            for column, result in zip(columns, results):
+                if result:
+                    column[row >> 3] |= 1 << (row & 7)
+        return [int.from_bytes(column, "little") for column in columns]
+
+def gray_result_mask(exp, long_names=False):
+    '''
+    Returns the result mask of the expression string `exp`, evaluated
+    incrementally in Gray-code order. Returns None if it is invalid.
+    '''
+    exp_obj = BooleanExpr(exp, long_names)
+    if exp_obj.error:
+        return None
+    dag = ExprDag()
+    dag.add(exp_obj)
+    return dag.get_result_masks()[0]
@@ -0,0 +1,249 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+An event-driven, gate-level simulator for boolean expressions. One or more
+expressions are treated as a netlist (see `ExprDag`, each operator is a
+gate) and driven by a stimulus stream, one input vector per line. Only the
+gates whose inputs changed are evaluated, and vectors can be packed into
+bit-parallel words so each gate evaluation simulates many vectors at once.
+
+Stimulus files start with a header naming the inputs, followed by one
+vector per line with a 0 or 1 for each input (in header order). Blank
+lines and lines starting with '#' are skipped:
+
+    # a b cin
+    a b cin
+    000
+    011
+    1 1 1
+'''
+import heapq
+import re
+
+from .boolean_expr_parser import BooleanExpr
+from .expr_dag import ExprDag
+
+# Input names in a stimulus header are split on commas and whitespace
+HEADER_SPLIT = re.compile(r"[\s,]+")
+
+def iter_stimulus(file_obj):
+    '''
+    Reads a stimulus stream. Returns the list of input names and a
+    generator of vectors, each a tuple of 0/1 ints in header order. The
+    stream is read lazily, one line at a time.
+    '''
+    lines = iter_lines_numbered(file_obj)
+    for _, line in lines:
+        names = [name for name in HEADER_SPLIT.split(line) if name]
+        break
+    else:
+        raise ValueError("The stimulus has no header")
+
+    def vectors():
+        '''Parses the remaining lines into vectors'''
+        for line_num, line in lines:
+            bits = line.replace(",", "").replace(" ", "").replace("\t", "")
+            if len(bits) != len(names) or bits.strip("01"):
+                raise ValueError("Line {}: expected {} bits, got {!r}".format(
+                    line_num, len(names), line))
+            yield tuple(int(bit) for bit in bits)
+    return names, vectors()
+
+def iter_lines_numbered(file_obj):
+    '''Yields `(line_num, line)` for lines that are not blank or comments'''
+    for line_num, line in enumerate(file_obj, 1):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line_num, line
+
+class GateSimulator(object):
+    '''
+    Simulates a netlist built from boolean expressions. Node values are
+    ints holding one bit per vector being simulated, so the same event
+    queue handles single vectors and bit-parallel batches. To print the
+    outputs of a full adder for every vector in a file, we would do:
+    >>> sim = GateSimulator(["a^b^cin", "a*b + cin*(a^b)"], long_names=True)
+    >>> with open("stimulus.txt") as stimulus:
+    ...     for outputs in sim.run_file(stimulus):
+    ...         print(outputs)
+    '''
+    # DAG of gates, and the nodes that are the outputs
+    dag = None
+    roots = None
+    # Node -> the gates reading it
+    fanouts = None
+    # Node -> its current value, one bit per vector in the batch
+    values = None
+    # A word with a bit set for every vector in the batch
+    full = 1
+    # Gates evaluated so far, to see how much work events save
+    evaluations = 0
+
+    def __init__(self, exps, long_names=False):
+        '''Builds the netlist from the expression strings in `exps`'''
+        self.dag = ExprDag()
+        self.roots = []
+        for exp in exps:
+            exp_obj = BooleanExpr(exp, long_names)
+            if exp_obj.error:
+                raise ValueError("The expression: {}, is invalid!\n{}".format(
+                    exp, exp_obj.error_msg))
+            self.roots.append(self.dag.add(exp_obj))
+        self.fanouts = [[] for _ in range(len(self.dag))]
+        for node, op in enumerate(self.dag.ops):
+            if op is not None:
+                self.fanouts[self.dag.lefts[node]].append(node)
+                if self.dag.rights[node] is not None:
+                    self.fanouts[self.dag.rights[node]].append(node)
+        self.var_nodes = dict((var, self.dag.var(var))
+                              for var in self.dag.get_var_list())
+        self.reset()
+
+    def get_inputs(self):
+        '''The inputs of the netlist, in sorted order'''
+        return self.dag.get_var_list()
+
+    def reset(self, width=1):
+        '''
+        Sets every input to 0 for a batch of `width` vectors, evaluating
+        every gate once.
+        '''
+        self.full = (1 << width) - 1
+        self.values = self.dag.evaluate_bits(
+            dict.fromkeys(self.var_nodes, 0), self.full)
+
+    def set_inputs(self, changes):
+        '''
+        Applies new input values from the dictionary `changes` and
+        propagates the events. Gates are evaluated in topological order
+        (node ids already are), each at most once, and only if one of
+        its inputs changed value.
+        '''
+        values = self.values
+        fanouts = self.fanouts
+        ops = self.dag.ops
+        lefts = self.dag.lefts
+        rights = self.dag.rights
+        full = self.full
+        queue = []
+        scheduled = set()
+        for var, value in changes.items():
+            node = self.var_nodes[var]
+            if values[node] != value:
+                values[node] = value
+                for gate in fanouts[node]:
+                    if gate not in scheduled:
+                        scheduled.add(gate)
+                        heapq.heappush(queue, gate)
+        while queue:
+            node = heapq.heappop(queue)
+            op = ops[node]
+            if op == '!':
+                value = values[lefts[node]] ^ full
+            elif op == '*':
+                value = values[lefts[node]] & values[rights[node]]
+            elif op == '+':
+                value = values[lefts[node]] | values[rights[node]]
+            else:
+                value = values[lefts[node]] ^ values[rights[node]]
+            self.evaluations += 1
+            if value != values[node]:
+                values[node] = value
+                for gate in fanouts[node]:
+                    if gate not in scheduled:
+                        scheduled.add(gate)
+                        heapq.heappush(queue, gate)
+
+    def outputs(self):
+        '''The current value of each output'''
+        return tuple(self.values[root] for root in self.roots)
+
+    def run(self, names, vectors):
+        '''
+        Simulates each vector (a tuple of 0/1 for the inputs in `names`)
+        in turn, yielding a tuple with the value of each output.
+        '''
+        columns = self.input_columns(names)
+        self.reset()
+        for vector in vectors:
+            self.set_inputs(dict((var, vector[i]) for var, i in columns))
+            yield self.outputs()
+
+    def run_batched(self, names, vectors, width=64):
+        '''
+        Like `run`, but packs `width` vectors into the bits of a word per
+        input, so every gate evaluation simulates a whole batch.
+        '''
+        columns = self.input_columns(names)
+        self.reset(width)
+        batch = []
+        for vector in vectors:
+            batch.append(vector)
+            if len(batch) == width:
+                for outputs in self.run_batch(columns, batch):
+                    yield outputs
+                batch = []
+        for outputs in self.run_batch(columns, batch):
+            yield outputs
+
+    def run_batch(self, columns, batch):
+        '''Simulates a batch of at most `width` vectors as one word each'''
+        changes = {}
+        for var, i in columns:
+            word = 0
+            for bit, vector in enumerate(batch):
+                word |= vector[i] << bit
+            changes[var] = word
+        self.set_inputs(changes)
+        words = self.outputs()
+        for bit in range(len(batch)):
+            yield tuple(word >> bit & 1 for word in words)
+
+    def input_columns(self, names):
+        '''Pairs each netlist input with its column in the stimulus'''
+        missing = [var for var in self.var_nodes if var not in names]
+        if missing:
+            raise ValueError("The stimulus is missing inputs: {}".format(
+                ", ".join(missing)))
+        return [(var, names.index(var)) for var in self.var_nodes]
+
+    def run_file(self, file_obj, width=1):
+        '''
+        Simulates every vector of a stimulus stream (see `iter_stimulus`),
+        batching `width` vectors per word when `width` is above 1.
+        '''
+        names, vectors = iter_stimulus(file_obj)
+        if width > 1:
+            return self.run_batched(names, vectors, width)
+        return self.run(names, vectors)
+
+def simulate_file(exps, stimulus_path, out_file, width=64, long_names=False):
+    '''
+    Simulates the expressions against the stimulus file at
+    `stimulus_path`, writing one line of output bits per vector to the
+    file object `out_file`. Returns the number of vectors simulated.
+    '''
+    sim = GateSimulator(exps, long_names)
+    count = 0
+    with open(stimulus_path) as stimulus:
+        out_file.write(" ".join(exps) + "\n")
+        for outputs in sim.run_file(stimulus, width):
+            out_file.write("".join(str(bit) for bit in outputs) + "\n")
+            count += 1
+    return count
@@ -0,0 +1,123 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+Works backwards from constraints to chip geometries: given the capacity,
+the word size (which fixes the byte-select bits), a range of page sizes
+and addresses that must start a page, lists every (page, offset,
+byte-select) split that fits, ranked. Each constraint is checked with
+bit arithmetic on the split, no AddressParser or address string is made
+until a candidate is turned into a parser with `to_parser`.
+
+>>> for geo in search(capacity_bytes=2 ** 32, word_bytes=4,
+...                   page_bytes=(4096, 65536), aligned=[0x10000]):
+...     print(geo.page_bits, geo.offs_bits, geo.byte_bits)
+'''
+from collections import namedtuple
+from functools import lru_cache
+import heapq
+
+from .cache_simulator import log2_exact
+from .page_address_calc import AddressParser
+
+class Geometry(namedtuple("Geometry", [
+        "page_bits", "offs_bits", "byte_bits", "page_bytes", "pages",
+        "hex_length"])):
+    '''A candidate chip geometry found by `search`'''
+    __slots__ = ()
+
+    def to_parser(self):
+        '''The AddressParser of this geometry'''
+        return AddressParser(self.page_bits, self.offs_bits, self.byte_bits)
+
+@lru_cache(maxsize=None)
+def hex_length(total_bits):
+    '''
+    The length of a hex address of `total_bits` bits, the same as
+    `AddressParser.get_hex_length`, computed once per size.
+    '''
+    return AddressParser(0, total_bits, 0).get_hex_length()
+
+def alignment_bits(addresses):
+    '''
+    How many low bits are zero in every address, i.e. the largest page
+    shift that keeps them all on page boundaries (None if no limit).
+    '''
+    combined = 0
+    for address in addresses:
+        combined |= address
+    if combined == 0:
+        return None
+    # The lowest set bit of any address limits the alignment
+    return (combined & -combined).bit_length() - 1
+
+RANKINGS = {
+    # Fewest pages first, i.e. the smallest page table
+    "fewest_pages": lambda geo: (geo.page_bits, geo.byte_bits),
+    # Most pages first, i.e. the finest-grained pages
+    "most_pages": lambda geo: (-geo.page_bits, geo.byte_bits),
+}
+
+def search(total_bits=None, capacity_bytes=None, word_bytes=None,
+           page_bytes=None, aligned=(), min_pages=1, rank="fewest_pages",
+           limit=None):
+    '''
+    Returns every Geometry meeting the constraints, best first.
+
+    The address size is `total_bits`, or is derived from `capacity_bytes`.
+    `word_bytes` fixes the byte-select bits (any split is tried if None).
+    `page_bytes` is a `(smallest, largest)` page size range, every address
+    in `aligned` must be the start of a page, and there must be at least
+    `min_pages` pages. `rank` is a name from RANKINGS or a key function
+    on a Geometry, and `limit` keeps only that many of the best.
+    '''
+    if total_bits is None:
+        total_bits = log2_exact(capacity_bytes, "Capacity")
+    if total_bits < 0:
+        raise ValueError("Total bits must be non-negative")
+    key = RANKINGS[rank] if isinstance(rank, str) else rank
+
+    # The page shift is the offset plus the byte-select bits
+    min_shift, max_shift = 0, total_bits
+    if page_bytes is not None:
+        smallest, largest = page_bytes
+        min_shift = max(min_shift, (max(smallest, 1) - 1).bit_length())
+        max_shift = min(max_shift, largest.bit_length() - 1)
+    align = alignment_bits(aligned)
+    if align is not None:
+        max_shift = min(max_shift, align)
+    if any(address >> total_bits for address in aligned):
+        return []
+    max_shift = min(max_shift,
+                    total_bits - (max(min_pages, 1) - 1).bit_length())
+
+    if word_bytes is not None:
+        byte_range = [log2_exact(word_bytes, "Word size")]
+    else:
+        byte_range = range(0, max_shift + 1)
+    length = hex_length(total_bits)
+    candidates = []
+    for byte_bits in byte_range:
+        for shift in range(max(min_shift, byte_bits), max_shift + 1):
+            page_bits = total_bits - shift
+            candidates.append(Geometry(page_bits, shift - byte_bits,
+                                       byte_bits, 1 << shift,
+                                       1 << page_bits, length))
+    if limit is not None:
+        return heapq.nsmallest(limit, candidates, key=key)
+    return sorted(candidates, key=key)
@@ -0,0 +1,229 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+Opt-in instrumentation for BooleanExpr and AddressParser. Nothing is
+measured (and nothing costs anything) until `enable` wraps the methods of
+each phase; `disable` puts the originals back. For example,
+
+    with instrument() as stats:
+        BooleanExpr("A*B+C").process_all_exps()
+    print(stats.format_report())
+
+Each phase records its call count, rows handled and wall time. Times are
+exclusive: when `iter_lines` asks for a block to be evaluated, that time
+goes to "evaluate" and only the rest goes to "format".
+'''
+from contextlib import contextmanager
+from functools import wraps
+import threading
+import time
+
+from .boolean_expr_parser import BooleanExpr
+from .page_address_calc import AddressParser
+
+def one_row(args, result):
+    '''A call that handles a single row'''
+    return 1
+
+def full_rows(args, result):
+    '''`evaluate_bits(patterns, full)` handles a row per bit of `full`'''
+    return args[2].bit_length()
+
+def page_rows(args, result):
+    '''`get_start_end` handles a page when the page number is valid'''
+    return 1 if isinstance(result, list) else 0
+
+# (class, method, phase, rows handled per call) for plain methods
+TIMED_METHODS = [
+    (BooleanExpr, "process_exp", "parse", None),
+    (BooleanExpr, "compile_exp", "compile", None),
+    (BooleanExpr, "validate", "validate", None),
+    (BooleanExpr, "evaluate", "evaluate", one_row),
+    (BooleanExpr, "evaluate_bits", "evaluate", full_rows),
+    (BooleanExpr, "process_single_exp", "format", one_row),
+    (AddressParser, "get_start_end", "address", page_rows),
+    (AddressParser, "format_hex", "to_hex", None),
+]
+# (class, method, phase, lines that are not rows) for generators
+TIMED_GENERATORS = [
+    (BooleanExpr, "iter_lines", "format", 2),
+]
+
+class PhaseStats(object):
+    '''Totals for one phase'''
+    def __init__(self):
+        '''Nothing recorded yet'''
+        self.calls = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+    def as_dict(self):
+        '''The totals as a plain dict'''
+        return {"calls": self.calls, "rows": self.rows,
+                "seconds": self.seconds}
+
+class Stats(object):
+    '''
+    Collects the time spent in each phase. `callback(phase, seconds, rows)`
+    is called, if given, every time a call to a phase finishes.
+    '''
+    def __init__(self, callback=None):
+        '''Starts with no phases'''
+        self.callback = callback
+        self.phases = {}
+        self.lock = threading.Lock()
+        # Frames of the phases running on each thread: [start, child time]
+        self.local = threading.local()
+
+    def begin(self):
+        '''Starts timing a call, returns its frame for `end`'''
+        stack = self.local.__dict__.setdefault("stack", [])
+        frame = [time.perf_counter(), 0.0]
+        stack.append(frame)
+        return frame
+
+    def end(self, frame):
+        '''
+        Stops timing the call of `frame` and returns its exclusive time,
+        charging the whole call to the caller's children.
+        '''
+        elapsed = time.perf_counter() - frame[0]
+        stack = self.local.stack
+        stack.pop()
+        if stack:
+            stack[-1][1] += elapsed
+        return elapsed - frame[1]
+
+    def add(self, phase, seconds, rows=0):
+        '''Records a finished call to `phase`'''
+        with self.lock:
+            totals = self.phases.get(phase)
+            if totals is None:
+                totals = self.phases[phase] = PhaseStats()
+            totals.calls += 1
+            totals.rows += rows
+            totals.seconds += seconds
+        if self.callback is not None:
+            self.callback(phase, seconds, rows)
+
+    def reset(self):
+        '''Forgets everything recorded so far'''
+        with self.lock:
+            self.phases = {}
+
+    def as_dict(self):
+        '''Every phase's totals, keyed by phase'''
+        with self.lock:
+            return dict((phase, totals.as_dict())
+                        for phase, totals in self.phases.items())
+
+    def format_report(self):
+        '''The totals as a table, slowest phase first'''
+        lines = ["{:<10} {:>10} {:>12} {:>12}".format(
+            "phase", "calls", "rows", "seconds")]
+        report = self.as_dict()
+        for phase in sorted(report, key=lambda p: -report[p]["seconds"]):
+            totals = report[phase]
+            lines.append("{:<10} {:>10} {:>12} {:>12.6f}".format(
+                phase, totals["calls"], totals["rows"], totals["seconds"]))
+        return "\n".join(lines)
+
+def timed_method(stats, phase, func, rows):
+    '''Wraps `func` to record each call in `stats`'''
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        '''Times the call'''
+        frame = stats.begin()
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        finally:
+            seconds = stats.end(frame)
+            stats.add(phase, seconds, rows(args, result) if rows else 0)
+    return wrapper
+
+def timed_generator(stats, phase, func, extra_lines):
+    '''
+    Wraps the generator `func`, timing each step. The whole iteration is
+    recorded as one call once it ends, with the lines yielded less
+    `extra_lines` as rows.
+    '''
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        '''Times every step of the generator'''
+        gen = func(*args, **kwargs)
+        seconds = 0.0
+        count = 0
+        try:
+            while True:
+                frame = stats.begin()
+                try:
+                    item = next(gen)
+                except StopIteration:
+                    break
+                finally:
+                    seconds += stats.end(frame)
+                count += 1
+                yield item
+        finally:
+            gen.close()
+            stats.add(phase, seconds, max(count - extra_lines, 0))
+    return wrapper
+
+# The methods replaced by `enable`, to be put back by `disable`
+ORIGINALS = []
+
+def enable(stats=None, callback=None):
+    '''
+    Starts recording every phase into `stats` (a new `Stats` using
+    `callback` if not given) and returns it. Applies to all instances in
+    every thread until `disable` is called.
+    '''
+    disable()
+    if stats is None:
+        stats = Stats(callback)
+    for cls, name, phase, rows in TIMED_METHODS:
+        func = cls.__dict__[name]
+        ORIGINALS.append((cls, name, func))
+        setattr(cls, name, timed_method(stats, phase, func, rows))
+    for cls, name, phase, extra_lines in TIMED_GENERATORS:
+        func = cls.__dict__[name]
+        ORIGINALS.append((cls, name, func))
+        setattr(cls, name, timed_generator(stats, phase, func, extra_lines))
+    return stats
+
+def disable():
+    '''Puts back the original, untimed, methods'''
+    while ORIGINALS:
+        cls, name, func = ORIGINALS.pop()
+        setattr(cls, name, func)
+
+def is_enabled():
+    '''True while the phases are being recorded'''
+    return bool(ORIGINALS)
+
+@contextmanager
+def instrument(stats=None, callback=None):
+    '''Records every phase while in the `with` block, see `enable`'''
+    stats = enable(stats, callback)
+    try:
+        yield stats
+    finally:
+        disable()
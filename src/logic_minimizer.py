@@ -0,0 +1,299 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+Minimizes the truth table of a boolean expression into a sum of products
+(e.g. `A*!B + C`) that can be fed back into BooleanExpr.
+
+Implicants are encoded as a pair of ints `(value, care)` over the row
+number of the truth table: `care` has a bit set for every variable the
+implicant tests, and `value` holds what those variables must be. The
+first variable of the table is the most significant bit, so the row
+`row` is covered when `row & care == value`.
+'''
+
+from .boolean_expr_parser import BooleanExpr, popcount
+
+# Tables with at most this many variables are minimized exactly
+QM_MAX_VARS = 10
+# Nodes the exact cover search may visit before settling for its best
+COVER_SEARCH_LIMIT = 20000
+
+def minimize(exp_obj, method=None):
+    '''
+    Returns a minimal sum of products equivalent to the BooleanExpr
+    `exp_obj`, or None if the expression is invalid. `method` is "qm"
+    (Quine-McCluskey, exact), "espresso" (heuristic, fast for larger
+    tables) or None to pick by the number of variables.
+    '''
+    result_mask = exp_obj.get_result_mask()
+    if result_mask is None:
+        return None
+    var_list = exp_obj.get_var_list()
+    if method is None:
+        method = "qm" if len(var_list) <= QM_MAX_VARS else "espresso"
+    if method == "qm":
+        cubes = quine_mccluskey(result_mask, len(var_list))
+    elif method == "espresso":
+        cubes = espresso(exp_obj, result_mask, var_list)
+    else:
+        raise ValueError("Unknown minimization method: {}".format(method))
+    return format_sop(cubes, var_list, result_mask)
+
+def minimize_exp(exp, method=None, long_names=False):
+    '''Minimizes the expression string `exp`, see `minimize`'''
+    return minimize(BooleanExpr(exp, long_names), method)
+
+def format_sop(cubes, var_list, result_mask):
+    '''
+    Formats implicants as a sum of products over `var_list`. The grammar
+    has no constants, so always false and always true are written as a
+    contradiction and a tautology of the first variable.
+    '''
+    if not result_mask:
+        return "{0}*!{0}".format(var_list[0])
+    terms = []
+    for value, care in cubes:
+        if not care:
+            return "{0}+!{0}".format(var_list[0])
+        literals = []
+        for depth, var in enumerate(var_list):
+            bit = 1 << (len(var_list) - 1 - depth)
+            if care & bit:
+                literals.append(var if value & bit else "!" + var)
+        terms.append("*".join(literals))
+    return " + ".join(terms)
+
+def count_literals(cubes):
+    '''The number of literals in a sum of products, its cost after terms'''
+    return sum(popcount(care) for _, care in cubes)
+
+######################################################################
+####### Quine-McCluskey ##############################################
+######################################################################
+
+def prime_implicants(result_mask, var_num):
+    '''
+    Finds every prime implicant of the table by repeatedly merging
+    implicants that differ in a single variable. Implicants with the
+    same `care` are kept in a set, so finding the partner of one is a
+    single lookup instead of a pairwise comparison.
+    '''
+    full_care = (1 << var_num) - 1
+    minterms = [row for row in range(1 << var_num) if result_mask >> row & 1]
+    level = {full_care: set(minterms)}
+    primes = []
+    while level:
+        next_level = {}
+        for care, values in level.items():
+            merged = set()
+            for value in values:
+                bits = care
+                while bits:
+                    bit = bits & -bits
+                    bits ^= bit
+                    if not value & bit and value | bit in values:
+                        next_level.setdefault(care ^ bit, set()).add(value)
+                        merged.add(value)
+                        merged.add(value | bit)
+            primes.extend((value, care) for value in values - merged)
+        level = next_level
+    return primes
+
+def quine_mccluskey(result_mask, var_num):
+    '''
+    Returns a minimum cover of the table with prime implicants: fewest
+    terms first, then fewest literals. Essential primes are taken first
+    and the rest is found with a bounded branch and bound search.
+    '''
+    primes = prime_implicants(result_mask, var_num)
+    minterms = [row for row in range(1 << var_num) if result_mask >> row & 1]
+    # Bit i of a cover is the i-th minterm
+    covers = []
+    for value, care in primes:
+        cover = 0
+        for i, row in enumerate(minterms):
+            if row & care == value:
+                cover |= 1 << i
+        covers.append(cover)
+    # Primes covering each minterm, for picking the hardest one to cover
+    covered_by = [[] for _ in minterms]
+    for index, cover in enumerate(covers):
+        i = 0
+        while cover:
+            if cover & 1:
+                covered_by[i].append(index)
+            cover >>= 1
+            i += 1
+
+    def cost(chosen):
+        '''Fewest terms, then fewest literals'''
+        return (len(chosen), count_literals(primes[i] for i in chosen))
+
+    # Essential primes are the only cover for some minterm
+    chosen = []
+    remaining = (1 << len(minterms)) - 1
+    for options in covered_by:
+        if len(options) == 1 and options[0] not in chosen:
+            chosen.append(options[0])
+            remaining &= ~covers[options[0]]
+
+    best = [greedy_cover(covers, remaining, chosen)]
+    budget = [COVER_SEARCH_LIMIT]
+
+    def search(chosen, remaining):
+        '''Branches on the primes covering the least covered minterm'''
+        needed = len(chosen) + (1 if remaining else 0)
+        if budget[0] <= 0 or needed > len(best[0]):
+            return
+        budget[0] -= 1
+        if not remaining:
+            if cost(chosen) < cost(best[0]):
+                best[0] = list(chosen)
+            return
+        hardest = None
+        i = 0
+        rest = remaining
+        while rest:
+            if rest & 1 and (hardest is None or
+                             len(covered_by[i]) < len(covered_by[hardest])):
+                hardest = i
+            rest >>= 1
+            i += 1
+        options = sorted(covered_by[hardest], key=lambda index:
+                         -popcount(covers[index] & remaining))
+        for index in options:
+            chosen.append(index)
+            search(chosen, remaining & ~covers[index])
+            chosen.pop()
+
+    search(chosen, remaining)
+    return [primes[i] for i in best[0]]
+
+def greedy_cover(covers, remaining, chosen):
+    '''Extends `chosen` with whichever cover takes the most minterms'''
+    chosen = list(chosen)
+    while remaining:
+        index = max(range(len(covers)),
+                    key=lambda i: popcount(covers[i] & remaining))
+        chosen.append(index)
+        remaining &= ~covers[index]
+    return chosen
+
+######################################################################
+####### Espresso-style heuristic #####################################
+######################################################################
+
+def espresso(exp_obj, result_mask, var_list):
+    '''
+    Heuristic minimization for tables too large for Quine-McCluskey.
+    Each uncovered minterm is expanded into a cube as large as possible
+    without touching the OFF-set, then redundant cubes are dropped. Rows
+    covered by a cube are computed bit-sliced with the packed variable
+    columns from BooleanExpr, so each check is a few bitwise ops.
+    '''
+    var_num = len(var_list)
+    full = (1 << (1 << var_num)) - 1
+    patterns = exp_obj.get_var_patterns(var_list)
+    # Rows where each variable (by row bit) is 1 and where it is 0
+    ones = {}
+    zeros = {}
+    for depth, var in enumerate(var_list):
+        bit = 1 << (var_num - 1 - depth)
+        ones[bit] = patterns[var]
+        zeros[bit] = patterns[var] ^ full
+    off_set = full ^ result_mask
+
+    def literal_rows(value, bit):
+        '''The rows where the variable at `bit` has the value in `value`'''
+        return ones[bit] if value & bit else zeros[bit]
+
+    def cube_rows(value, care):
+        '''The truth-table rows covered by a cube'''
+        rows = full
+        bits = care
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            rows &= literal_rows(value, bit)
+        return rows
+
+    cubes = []
+    uncovered = result_mask
+    while uncovered:
+        row = (uncovered & -uncovered).bit_length() - 1
+        cube = expand(row, (1 << var_num) - 1, literal_rows, full, off_set,
+                      uncovered)
+        cubes.append(cube)
+        uncovered &= ~cube_rows(*cube)
+    return irredundant(cubes, cube_rows)
+
+def expand(value, care, literal_rows, full, off_set, uncovered):
+    '''
+    Greedily drops literals from a cube while it stays inside the ON-set,
+    each time dropping the literal that covers the most uncovered rows.
+    The rows covered without each literal come from prefix and suffix
+    ANDs of the literal columns, so a step costs O(literals) bitwise ops.
+    '''
+    while True:
+        bits = []
+        rest = care
+        while rest:
+            bit = rest & -rest
+            rest ^= bit
+            bits.append(bit)
+        columns = [literal_rows(value, bit) for bit in bits]
+        # suffix[i] is the AND of the columns from i on
+        suffix = [full] * (len(bits) + 1)
+        for i in range(len(bits) - 1, -1, -1):
+            suffix[i] = suffix[i + 1] & columns[i]
+        best = None
+        best_gain = -1
+        prefix = full
+        for i, bit in enumerate(bits):
+            rows = prefix & suffix[i + 1]
+            prefix &= columns[i]
+            if rows & off_set:
+                continue
+            gain = popcount(rows & uncovered)
+            if gain > best_gain:
+                best, best_gain = bit, gain
+        if best is None:
+            return (value, care)
+        value &= ~best
+        care ^= best
+
+def irredundant(cubes, cube_rows):
+    '''
+    Drops cubes whose rows are all covered by the other cubes. Cubes are
+    visited once, comparing against the kept cubes before them and all
+    the cubes after them (prefix and suffix ORs).
+    '''
+    # Try to drop the smallest cubes (most literals) first
+    cubes = sorted(cubes, key=lambda cube: -popcount(cube[1]))
+    rows = [cube_rows(*cube) for cube in cubes]
+    suffix = [0] * (len(cubes) + 1)
+    for i in range(len(cubes) - 1, -1, -1):
+        suffix[i] = suffix[i + 1] | rows[i]
+    kept = []
+    prefix = 0
+    for i, cube in enumerate(cubes):
+        if rows[i] & ~(prefix | suffix[i + 1]):
+            kept.append(cube)
+            prefix |= rows[i]
+    return kept
@@ -0,0 +1,196 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+A system memory map: several chips, each an AddressParser, placed at
+base addresses on one bus. Overlapping chips are rejected and the gaps
+between them recorded when the map is built, and any bus address can be
+routed to `(region, page, offset, byte_sel)` with a bisect over the
+sorted region starts (or, for whole arrays, NumPy's `searchsorted`).
+
+>>> board = MemoryMap([("rom", AddressParser(4, 8, 2), 0x0000),
+...                    ("ram", AddressParser(6, 8, 2), 0x10000)])
+>>> board.route(0x10123)
+'''
+from bisect import bisect_right
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class Region(object):
+    '''A chip mapped at `base`, covering `base` up to (not incl.) `end`'''
+    def __init__(self, name, chip, base):
+        '''Places `chip` at `base`'''
+        if base < 0:
+            raise ValueError("Base address must be non-negative")
+        self.name = name
+        self.chip = chip
+        self.base = base
+        self.end = base + 2 ** chip.total_bits
+
+    def __repr__(self):
+        return "Region({!r}, 0x{:X}-0x{:X})".format(self.name, self.base,
+                                                    self.end - 1)
+
+class MemoryMap(object):
+    '''
+    Maps every `(name, chip, base)` in `regions`. Raises ValueError if two
+    regions overlap. The unmapped ranges between regions are listed in
+    `gaps` as `(start, end)` pairs, end exclusive.
+    '''
+    def __init__(self, regions=()):
+        '''Builds the index of the regions'''
+        self.regions = []
+        self.starts = []
+        self.gaps = []
+        self.by_name = {}
+        self.hex_template = "0x{:01X}"
+        for name, chip, base in regions:
+            self.regions.append(Region(name, chip, base))
+        self.build()
+
+    def add(self, name, chip, base):
+        '''Maps one more chip, rebuilding the index'''
+        region = Region(name, chip, base)
+        self.regions.append(region)
+        try:
+            self.build()
+        except ValueError:
+            self.regions.remove(region)
+            self.build()
+            raise
+
+    def build(self):
+        '''Sorts the regions, checks for overlaps and finds the gaps'''
+        self.regions.sort(key=lambda region: region.base)
+        by_name = {}
+        self.gaps = []
+        last_end = 0
+        for prev, region in zip([None] + self.regions, self.regions):
+            if region.name in by_name:
+                raise ValueError("Duplicate region: {}".format(region.name))
+            by_name[region.name] = region
+            if prev is not None and region.base < prev.end:
+                raise ValueError("Regions {} and {} overlap".format(
+                    prev.name, region.name))
+            if region.base > last_end:
+                self.gaps.append((last_end, region.base))
+            last_end = region.end
+        self.by_name = by_name
+        self.starts = [region.base for region in self.regions]
+        # Bus addresses are padded to the width of the highest address
+        self.hex_template = "0x{:0%dX}" % max(
+            1, ((last_end - 1).bit_length() + 3) // 4)
+        if numpy is not None and self.regions and last_end <= 2 ** 63:
+            self.arrays = self.build_arrays()
+        else:
+            self.arrays = None
+
+    def build_arrays(self):
+        '''Per-region columns for `route_many`'''
+        def column(values):
+            '''An array of one value per region'''
+            return numpy.array(values, dtype=numpy.int64)
+        regions = self.regions
+        return {
+            "starts": column(self.starts),
+            "ends": column([region.end for region in regions]),
+            "page_shift": column([r.chip.page_shift for r in regions]),
+            "byte_bits": column([r.chip.byte_bits for r in regions]),
+            "offs_mask": column([r.chip.offs_mask for r in regions]),
+            "byte_mask": column([r.chip.byte_mask for r in regions]),
+        }
+
+    def find_region(self, address):
+        '''The position of the region holding `address`, or None'''
+        index = bisect_right(self.starts, address) - 1
+        if index >= 0 and address < self.regions[index].end:
+            return index
+        return None
+
+    def route(self, address):
+        '''
+        Routes the bus `address` to `(name, page, offset, byte_sel)`, or
+        returns None if no chip is mapped there.
+        '''
+        index = self.find_region(address)
+        if index is None:
+            return None
+        region = self.regions[index]
+        return (region.name,) + region.chip.decode_address(
+            address - region.base)
+
+    def route_many(self, addresses):
+        '''
+        Routes a whole array of addresses. Returns `(regions, pages,
+        offsets, byte_sels)` where `regions` holds the position of each
+        address's region in `regions` (-1 where nothing is mapped, with
+        meaningless fields). NumPy arrays in give NumPy arrays out.
+        '''
+        if self.arrays is not None and isinstance(addresses, numpy.ndarray):
+            return self.route_array(addresses.astype(numpy.int64))
+        indexes = []
+        pages = []
+        offsets = []
+        byte_sels = []
+        regions = self.regions
+        for address in addresses:
+            index = self.find_region(address)
+            if index is None:
+                indexes.append(-1)
+                pages.append(0)
+                offsets.append(0)
+                byte_sels.append(0)
+                continue
+            chip = regions[index].chip
+            local = address - regions[index].base
+            indexes.append(index)
+            pages.append(local >> chip.page_shift)
+            offsets.append(local >> chip.byte_bits & chip.offs_mask)
+            byte_sels.append(local & chip.byte_mask)
+        return indexes, pages, offsets, byte_sels
+
+    def route_array(self, addresses):
+        '''The NumPy half of `route_many`'''
+        arrays = self.arrays
+        indexes = numpy.searchsorted(arrays["starts"], addresses,
+                                     side="right") - 1
+        clipped = numpy.maximum(indexes, 0)
+        mapped = (indexes >= 0) & (addresses < arrays["ends"][clipped])
+        indexes = numpy.where(mapped, indexes, -1)
+        local = numpy.where(mapped, addresses - arrays["starts"][clipped], 0)
+        pages = local >> arrays["page_shift"][clipped]
+        offsets = (local >> arrays["byte_bits"][clipped]) \
+            & arrays["offs_mask"][clipped]
+        byte_sels = local & arrays["byte_mask"][clipped]
+        return indexes, pages, offsets, byte_sels
+
+    def get_start_end(self, name, page_num):
+        '''
+        The bus addresses of the start and end of a page of the chip
+        `name`, formatted like AddressParser's.
+        '''
+        region = self.by_name[name]
+        if not region.chip.is_valid_page(page_num):
+            return "Invalid page number"
+        start = region.base + region.chip.get_address_int(page_num, True)
+        end = region.base + region.chip.get_address_int(page_num, False)
+        return [self.hex_template.format(start),
+                self.hex_template.format(end)]
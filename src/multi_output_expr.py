@@ -0,0 +1,127 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+Evaluates a bank of boolean expressions (e.g. the 7 segments of a decoder)
+over their shared inputs in a single sweep, producing one table with a
+column per output.
+'''
+
+from .boolean_expr_parser import TOO_MANY_VARS, BooleanExpr, fill_cells, \
+    iter_block_patterns, row_bits
+from .expr_dag import ExprDag
+
+class MultiBooleanExpr(object):
+    '''
+    Parses several expressions into one hash-consed DAG, so sub-expressions
+    shared between outputs are computed once, and evaluates every output
+    bit-sliced in the same pass over the inputs. To print the table of a
+    half adder we would do the following:
+    >>> adder = MultiBooleanExpr(["A^B", "A*B"])
+    >>> print(adder.get_truth_table())
+    '''
+    # The parsed expressions, one per output
+    exp_objs = None
+    # DAG holding every expression, and the root node of each output
+    dag = None
+    roots = None
+    # Flag and message in case an error occurs in any expression
+    error = False
+    error_msg = ""
+
+    def __init__(self, exps, long_names=False):
+        '''Parses every expression string in `exps`'''
+        self.exp_objs = [BooleanExpr(exp, long_names) for exp in exps]
+        self.dag = ExprDag()
+        self.roots = []
+        self.error = False
+        self.error_msg = ""
+        for exp_obj in self.exp_objs:
+            if exp_obj.error:
+                self.error = True
+                self.error_msg = "The expression: {}, is invalid!\n{}".format(
+                    exp_obj.disp_exp, exp_obj.error_msg)
+                return
+            self.roots.append(self.dag.add(exp_obj))
+
+    def get_var_list(self):
+        '''The variables of all the expressions, in column order'''
+        return self.dag.get_var_list()
+
+    def iter_result_blocks(self, block_vars=12):
+        '''
+        Yields `(first_row, masks, rows)` for consecutive blocks of the
+        table, with a result mask per output (bit i is row `first_row + i`).
+        Every DAG node is evaluated once per block, for all outputs.
+        '''
+        if self.error:
+            return
+        for first_row, patterns, full in iter_block_patterns(
+                self.get_var_list(), block_vars):
+            values = self.dag.evaluate_bits(patterns, full)
+            yield first_row, [values[root] for root in self.roots], \
+                full.bit_length()
+
+    def get_result_masks(self):
+        '''
+        Returns the output column of each expression as a result mask over
+        the shared variables, or None if any expression is invalid.
+        '''
+        if self.error:
+            return None
+        var_num = len(self.get_var_list())
+        blocks = list(self.iter_result_blocks(var_num))
+        return blocks[0][1]
+
+    def iter_rows(self):
+        '''
+        Yields every row of the table as a tuple of the value of each
+        variable followed by the result of each expression.
+        '''
+        var_num = len(self.get_var_list())
+        for first_row, masks, rows in self.iter_result_blocks():
+            for offset in range(rows):
+                yield row_bits(first_row + offset, var_num) + \
+                    tuple(mask >> offset & 1 for mask in masks)
+
+    def iter_lines(self):
+        '''Yields the ascii table: the header, each row, then the footer'''
+        if self.error:
+            return
+        var_list = self.get_var_list()
+        columns = var_list + [exp_obj.disp_exp for exp_obj in self.exp_objs]
+        border = "".join("+" + "-" * (len(col) + 2) for col in columns)
+        border += "+\n"
+        cells = ["| {} " + " " * (len(col) - 1) for col in columns]
+        yield border + "".join("| {} ".format(col) for col in columns) + \
+            "|\n" + border
+        for row in self.iter_rows():
+            yield fill_cells(cells, row) + "|\n"
+        yield border
+
+    def get_truth_table(self, max_vars=5):
+        '''
+        Returns the formatted table with a column per expression. Like
+        `BooleanExpr.get_truth_table`, more than `max_vars` variables are
+        refused unless `max_vars` is None.
+        '''
+        if self.error:
+            return self.error_msg
+        if max_vars is not None and len(self.get_var_list()) > max_vars:
+            return TOO_MANY_VARS
+        return "".join(self.iter_lines())
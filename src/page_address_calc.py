@@ -23,6 +23,14 @@ in my hardware class.
 Unit tests are distributed in,
     https://github.com/SpaceKatt/hardware_scripts
 '''
+from array import array
+from collections.abc import Sequence
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 class AddressParser(object):
     '''
@@ -37,6 +45,11 @@ class AddressParser(object):
     would do the following:
     >>> addy = AddressParser(3, 4, 5)
     >>> print(addy.get_start_end(7))
+
+    Addresses are computed with integer shifts, hex strings are only made
+    when asked for. To get the addresses of many pages at once,
+    >>> starts, ends = addy.get_start_end_many(range(8))
+    >>> addy.format_hex_many(ends)
     '''
     # The number of page bits
     page_bits = 0
@@ -48,6 +61,15 @@ class AddressParser(object):
     total_bits = 0
     # The length of the absolute hex address for our memory chip
     hex_length = 0
+    # How far the page number is shifted left within an address
+    page_shift = 0
+    # The offset and byte-selector bits of an address, all set
+    end_mask = 0
+    # Formats an integer address as an absolute hex address
+    hex_template = "0x{:01X}"
+    # The offset bits and the byte-selector bits, once shifted down
+    offs_mask = 0
+    byte_mask = 0
 
     def __init__(self, page, offset, byte_sel):
         '''
@@ -58,6 +80,11 @@ class AddressParser(object):
         self.byte_bits = byte_sel
         self.total_bits = page + offset + byte_sel
         self.hex_length = self.get_hex_length()
+        self.page_shift = offset + byte_sel
+        self.end_mask = (1 << self.page_shift) - 1
+        self.hex_template = "0x{:0%dX}" % self.hex_length
+        self.offs_mask = (1 << offset) - 1
+        self.byte_mask = (1 << byte_sel) - 1
 
     def to_hex(self, bin_num):
         '''
@@ -65,9 +92,22 @@ class AddressParser(object):
         representation (with uppercase letters). Also pads the hex number
         with zeros in order to make it into an absolute address.
         '''
-        value = hex(int(bin_num, 2))[2:].upper()
-        value = '0x' + value.zfill(self.hex_length)
-        return value
+        return self.format_hex(int(bin_num, 2))
+
+    def format_hex(self, address):
+        '''
+        Formats the integer `address` as an absolute hex address, the same
+        way as `to_hex`.
+        '''
+        return self.hex_template.format(address)
+
+    def format_hex_many(self, addresses):
+        '''
+        Formats every address of an array from `get_start_end_many`.
+        '''
+        if numpy is not None and isinstance(addresses, numpy.ndarray):
+            addresses = addresses.tolist()
+        return list(map(self.hex_template.format, addresses))
 
     def get_hex_length(self):
         '''
@@ -75,10 +115,8 @@ class AddressParser(object):
         specific memory chip (e.g., a chip with 17 total bits will
         have a hexidecimal address that is 5 characters long).
         '''
-        length = 1
-        while length * 4 < self.total_bits:
-            length += 1
-        return length
+        # Four bits per hex digit, rounding up, and at least one digit
+        return max(1, (self.total_bits + 3) // 4)
 
     def get_ending(self, is_start):
         '''
@@ -102,14 +140,18 @@ class AddressParser(object):
         Returns the absolute address of a specific page. Whether we
         are at the start or end of the page is indicated by `is_start`.
         '''
-        # Get the page number in its binary representation
-        page = "{0:b}".format(page_num)
-        # Get the offset and byte-selector bits
-        offset_byte_sel = self.get_ending(is_start)
+        return self.format_hex(self.get_address_int(page_num, is_start))
 
-        address = page + offset_byte_sel
-        # Return the absolute hex address
-        return self.to_hex(address)
+    def get_address_int(self, page_num, is_start):
+        '''
+        Returns the absolute address of a page as an integer: the page
+        number shifted above the offset and byte-selector bits, which are
+        all zero at the start of the page and all one at the end.
+        '''
+        address = page_num << self.page_shift
+        if is_start:
+            return address
+        return address | self.end_mask
 
     def is_valid_page(self, page_num):
         '''
@@ -131,6 +173,71 @@ class AddressParser(object):
         result.append(self.get_address(page_num, False))
         return result
 
+    def get_start_end_many(self, pages):
+        '''
+        Returns `(starts, ends)`, the integer start and end addresses of
+        every page in `pages` (a range, a sequence, or a NumPy array).
+        Ranges give `array`s built without a Python loop, NumPy arrays
+        give NumPy arrays, and chips whose addresses do not fit in 64 bits
+        give lists. Raises ValueError if any page number is invalid.
+        '''
+        if isinstance(pages, range):
+            if len(pages) and not (self.is_valid_page(pages[0])
+                                   and self.is_valid_page(pages[-1])):
+                raise ValueError("Invalid page number")
+            step = pages.step << self.page_shift
+            starts = range(pages.start << self.page_shift,
+                           pages.stop << self.page_shift, step)
+            ends = range(starts.start + self.end_mask,
+                         starts.stop + self.end_mask, step)
+            if self.total_bits > 64:
+                return list(starts), list(ends)
+            return array('Q', starts), array('Q', ends)
+        if numpy is not None and isinstance(pages, numpy.ndarray) \
+                and self.total_bits < 64:
+            if len(pages) and not (self.is_valid_page(int(pages.min()))
+                                   and self.is_valid_page(int(pages.max()))):
+                raise ValueError("Invalid page number")
+            starts = pages.astype(numpy.uint64) << numpy.uint64(
+                self.page_shift)
+            return starts, starts | numpy.uint64(self.end_mask)
+        pages = [int(page) for page in pages]
+        if pages and not (self.is_valid_page(min(pages))
+                          and self.is_valid_page(max(pages))):
+            raise ValueError("Invalid page number")
+        shift = self.page_shift
+        starts = [page << shift for page in pages]
+        ends = [start | self.end_mask for start in starts]
+        if self.total_bits > 64:
+            return starts, ends
+        return array('Q', starts), array('Q', ends)
+
+    def is_valid_address(self, address):
+        '''
+        Valid addresses are non-negative and fit in the chip's total bits.
+        '''
+        return 0 <= address < 2 ** self.total_bits
+
+    def decode_address(self, address):
+        '''
+        Splits an absolute address (an int, or a hex string like "0x1F")
+        into `(page, offset, byte_sel)`. Addresses outside of the chip
+        return an error message instead.
+        '''
+        if isinstance(address, str):
+            address = int(address, 16)
+        if not self.is_valid_address(address):
+            return "Invalid address"
+        return (address >> self.page_shift,
+                address >> self.byte_bits & self.offs_mask,
+                address & self.byte_mask)
+
+    def get_page_map(self):
+        '''
+        Returns a lazy PageMap over every page of the chip.
+        '''
+        return PageMap(self)
+
     def get_formatted_page_results(self, page_num):
         '''
         Formats results in a pretty fashion for display.
@@ -148,6 +255,110 @@ class AddressParser(object):
         result += "End:   " + page_addresses[1]
         return result
 
+class PageMap(Sequence):
+    '''
+    A read-only sequence of the `(page, start, end)` integer addresses of
+    a chip's pages (or of a range of them). Entries are computed when
+    they are asked for, so a chip with 2^40 pages costs no more than one
+    with 2^4. Slicing, with or without a step, gives another PageMap.
+    Python's `len` cannot report 2^63 pages or more, so maps that large
+    raise OverflowError from `len` and `page_count` should be used.
+
+    To export the 10 pages after the first million, in hex,
+    >>> pages = AddressParser(32, 10, 2).get_page_map()
+    >>> for page, start, end in pages[10 ** 6:10 ** 6 + 10].iter_hex():
+    ...     print(page, start, end)
+    '''
+    def __init__(self, chip, pages=None):
+        '''Maps the pages in the range `pages`, by default all of them'''
+        self.chip = chip
+        if pages is None:
+            pages = range(2 ** chip.page_bits)
+        self.pages = pages
+        # Computed rather than taken from len(pages), which is limited
+        step = pages.step
+        if step > 0:
+            self.page_count = max(0, (pages.stop - pages.start + step - 1)
+                                  // step)
+        else:
+            self.page_count = max(0, (pages.start - pages.stop - step - 1)
+                                  // -step)
+
+    def __len__(self):
+        if self.page_count > sys.maxsize:
+            raise OverflowError("{} pages is too many for len(), use "
+                                "page_count".format(self.page_count))
+        return self.page_count
+
+    def __reversed__(self):
+        for page in self.pages[::-1]:
+            yield self.get_entry(page)
+
+    def __getitem__(self, index):
+        '''The entry at `index`, or a PageMap for a slice'''
+        if isinstance(index, slice):
+            return PageMap(self.chip, self.pages[index])
+        return self.get_entry(self.pages[index])
+
+    def __iter__(self):
+        for page in self.pages:
+            yield self.get_entry(page)
+
+    def __contains__(self, entry):
+        if not isinstance(entry, tuple) or len(entry) != 3:
+            return False
+        return entry[0] in self.pages and self.get_entry(entry[0]) == entry
+
+    def __repr__(self):
+        return "PageMap({}, {}, {}, {!r})".format(
+            self.chip.page_bits, self.chip.offs_bits, self.chip.byte_bits,
+            self.pages)
+
+    def get_entry(self, page):
+        '''The start and end addresses of `page`, which must be valid'''
+        return (page, self.chip.get_address_int(page, True),
+                self.chip.get_address_int(page, False))
+
+    def index(self, entry, start=0, stop=None):
+        '''The position of `entry` in the map, without searching'''
+        if entry not in self:
+            raise ValueError("{!r} is not in the page map".format(entry))
+        position = self.pages.index(entry[0])
+        if position < start or (stop is not None and position >= stop):
+            raise ValueError("{!r} is not in the page map".format(entry))
+        return position
+
+    def count(self, entry):
+        '''1 if `entry` is in the map, else 0'''
+        return int(entry in self)
+
+    def page_containing(self, address):
+        '''
+        The entry of the page holding `address`, or None if the address is
+        outside of the chip or its page is not in this map.
+        '''
+        if not self.chip.is_valid_address(address):
+            return None
+        page = address >> self.chip.page_shift
+        if page not in self.pages:
+            return None
+        return self.get_entry(page)
+
+    def get_start_end_many(self):
+        '''Integer arrays of the start and end addresses, see AddressParser'''
+        return self.chip.get_start_end_many(self.pages)
+
+    def iter_hex(self):
+        '''Yields `(page, start, end)` with the addresses in hex'''
+        format_hex = self.chip.format_hex
+        for page, start, end in self:
+            yield page, format_hex(start), format_hex(end)
+
+    def iter_windows(self, size):
+        '''Yields the map as consecutive PageMaps of `size` pages'''
+        for first in range(0, self.page_count, size):
+            yield self[first:first + size]
+
 if __name__ == '__main__':
     ADDRE = AddressParser(4, 13, 0)
     print('-------------------------------------------------')
@@ -0,0 +1,496 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+Answers "can this expression be true?" and "how many inputs make it true?"
+without enumerating the truth table. The parsed expression is converted to
+CNF with the Tseitin encoding, then solved by a CDCL search (two watched
+literals, conflict learning, activity-based branching and restarts) or
+counted exactly by a DPLL search over the input variables that caches
+identical residual formulas (by a running hash of them).
+
+Literals are DIMACS style ints: variable `v` is `v` and its negation `-v`.
+'''
+import heapq
+import random
+
+from .boolean_bdd import order_variables
+from .boolean_expr_parser import BooleanExpr
+from .expr_dag import ExprDag
+
+def tseitin(exp_obj):
+    '''
+    Converts a parsed BooleanExpr into CNF. Returns `(clauses, var_ids,
+    num_vars, root)`, where `var_ids` maps each variable of the expression
+    to its CNF variable (1 up to len(var_ids)) and `root` is the literal
+    equal to the whole expression. Every operator gets a fresh variable
+    defined to equal it, shared sub-expressions are encoded once (see
+    `ExprDag`). Add the clause `[root]` to ask for the expression to be
+    true.
+    '''
+    if exp_obj.error:
+        raise ValueError(exp_obj.error_msg)
+    dag = ExprDag()
+    root = dag.add(exp_obj)
+    var_ids = dict((var, i + 1) for i, var in
+                   enumerate(exp_obj.get_var_list()))
+    num_vars = len(var_ids)
+    clauses = []
+    # DAG node -> the literal equal to it
+    lits = [0] * len(dag)
+    for node, op in enumerate(dag.ops):
+        if op is None:
+            lits[node] = var_ids[dag.lefts[node]]
+            continue
+        if op == '!':
+            # Negation does not need a variable of its own
+            lits[node] = -lits[dag.lefts[node]]
+            continue
+        one = lits[dag.lefts[node]]
+        two = lits[dag.rights[node]]
+        num_vars += 1
+        out = lits[node] = num_vars
+        if op == '*':
+            clauses.extend([[-out, one], [-out, two], [out, -one, -two]])
+        elif op == '+':
+            clauses.extend([[out, -one], [out, -two], [-out, one, two]])
+        else:
+            clauses.extend([[-out, one, two], [-out, -one, -two],
+                            [out, -one, two], [out, one, -two]])
+    return clauses, var_ids, num_vars, lits[root]
+
+class SatSolver(object):
+    '''
+    A CDCL SAT solver over a CNF formula with variables 1 to `num_vars`.
+    To find inputs that make an expression true, we would do:
+    >>> clauses, var_ids, num_vars, root = tseitin(BooleanExpr("A*!B"))
+    >>> print(SatSolver(num_vars, clauses + [[root]]).solve())
+    '''
+    # Variable -> 1 (true), -1 (false) or 0 (unassigned)
+    values = None
+    # Variable -> decision level it was assigned at
+    levels = None
+    # Variable -> index of the clause that implied it, None for decisions
+    reasons = None
+    # Assigned literals in order, and where each decision level starts
+    trail = None
+    trail_lim = None
+    # Literal -> indexes of the clauses watching it
+    watches = None
+    # False once the formula is known to be unsatisfiable
+    ok = True
+    # Running hash of the residual formula while counting, see
+    # `track_residual`, and None otherwise
+    residual_hash = None
+
+    # Activity decay applied after every conflict
+    var_decay = 0.95
+    # Conflicts before the first restart, and the growth after each one
+    restart_first = 100
+    restart_growth = 1.5
+
+    def __init__(self, num_vars, clauses):
+        '''Creates a solver and adds every clause in `clauses`'''
+        self.num_vars = num_vars
+        self.clauses = []
+        self.values = [0] * (num_vars + 1)
+        self.levels = [0] * (num_vars + 1)
+        self.reasons = [None] * (num_vars + 1)
+        self.phase = [False] * (num_vars + 1)
+        self.activity = [0.0] * (num_vars + 1)
+        self.bump = 1.0
+        self.order_heap = [(0.0, var) for var in range(1, num_vars + 1)]
+        self.trail = []
+        self.trail_lim = []
+        self.prop_head = 0
+        self.watches = {}
+        for var in range(1, num_vars + 1):
+            self.watches[var] = []
+            self.watches[-var] = []
+        self.ok = True
+        for clause in clauses:
+            self.add_clause(clause)
+        # Learnt clauses are implied by these, which are all that matter
+        self.num_original = len(self.clauses)
+
+    def lit_value(self, lit):
+        '''1 if `lit` is true, -1 if false and 0 if unassigned'''
+        value = self.values[abs(lit)]
+        return value if lit > 0 else -value
+
+    def add_clause(self, clause):
+        '''Adds a clause at decision level 0'''
+        clause = list(set(clause))
+        if any(-lit in clause for lit in clause):
+            # Always true
+            return
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            value = self.lit_value(clause[0])
+            if value == -1:
+                self.ok = False
+            elif value == 0:
+                self.enqueue(clause[0], None)
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        '''Stores a clause, watching its first two literals'''
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def enqueue(self, lit, reason):
+        '''Makes `lit` true at the current decision level'''
+        var = abs(lit)
+        self.values[var] = 1 if lit > 0 else -1
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(lit)
+        if self.residual_hash is not None:
+            self.hash_assign(lit)
+
+    def propagate(self):
+        '''
+        Unit propagation with two watched literals. Returns the index of
+        a conflicting clause, or None if there was no conflict.
+        '''
+        clauses = self.clauses
+        watches = self.watches
+        lit_value = self.lit_value
+        while self.prop_head < len(self.trail):
+            false_lit = -self.trail[self.prop_head]
+            self.prop_head += 1
+            watching = watches[false_lit]
+            watches[false_lit] = kept = []
+            for i, index in enumerate(watching):
+                clause = clauses[index]
+                # Keep the false literal in the second slot
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                if lit_value(clause[0]) == 1:
+                    kept.append(index)
+                    continue
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    if lit_value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], false_lit
+                        watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if lit_value(clause[0]) == -1:
+                        kept.extend(watching[i + 1:])
+                        self.prop_head = len(self.trail)
+                        return index
+                    self.enqueue(clause[0], index)
+        return None
+
+    def analyze(self, conflict):
+        '''
+        Finds the first unique implication point of a conflict. Returns
+        the learnt clause (its first literal is the one to assert) and
+        the decision level to jump back to.
+        '''
+        seen = set()
+        learnt = [0]
+        level = len(self.trail_lim)
+        counter = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for other in (clause if lit is None else clause[1:]):
+                var = abs(other)
+                if var in seen or self.levels[var] == 0:
+                    continue
+                seen.add(var)
+                self.bump_var(var)
+                if self.levels[var] == level:
+                    counter += 1
+                else:
+                    learnt.append(other)
+            # The most recent literal of the conflict on the trail
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clauses[self.reasons[abs(lit)]]
+        learnt[0] = -lit
+        if len(learnt) == 1:
+            return learnt, 0
+        # Watch the literal from the deepest remaining level second
+        deepest = max(range(1, len(learnt)),
+                      key=lambda i: self.levels[abs(learnt[i])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, self.levels[abs(learnt[1])]
+
+    def bump_var(self, var):
+        '''Raises the activity of a variable involved in a conflict'''
+        self.activity[var] += self.bump
+        if self.activity[var] > 1e100:
+            # Rescale everything to avoid overflow
+            self.activity = [act * 1e-100 for act in self.activity]
+            self.bump *= 1e-100
+            self.order_heap = [(-self.activity[var], var) for var in
+                               range(1, self.num_vars + 1)
+                               if not self.values[var]]
+            heapq.heapify(self.order_heap)
+        else:
+            heapq.heappush(self.order_heap, (-self.activity[var], var))
+
+    def backtrack(self, level):
+        '''Undoes every assignment above decision level `level`'''
+        if len(self.trail_lim) <= level:
+            return
+        tracking = self.residual_hash is not None
+        for lit in self.trail[self.trail_lim[level]:]:
+            if tracking:
+                self.hash_unassign(lit)
+            var = abs(lit)
+            self.values[var] = 0
+            self.reasons[var] = None
+            # Remember the polarity for the next decision on it
+            self.phase[var] = lit > 0
+            heapq.heappush(self.order_heap, (-self.activity[var], var))
+        del self.trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.prop_head = len(self.trail)
+
+    def pick_branch(self):
+        '''Returns the unassigned variable with the highest activity'''
+        while self.order_heap:
+            var = heapq.heappop(self.order_heap)[1]
+            if not self.values[var]:
+                return var
+        return None
+
+    def decide(self, lit):
+        '''Opens a new decision level with `lit` made true'''
+        self.trail_lim.append(len(self.trail))
+        self.enqueue(lit, None)
+
+    def solve(self):
+        '''
+        Searches for a satisfying assignment. Returns a list indexed by
+        variable (index 0 is unused) of True/False, or None if the
+        formula is unsatisfiable.
+        '''
+        if not self.ok:
+            return None
+        self.backtrack(0)
+        conflicts = 0
+        restart_limit = self.restart_first
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.trail_lim:
+                    self.ok = False
+                    return None
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.enqueue(learnt[0], self.watch(learnt))
+                self.bump /= self.var_decay
+                conflicts += 1
+                if conflicts >= restart_limit:
+                    conflicts = 0
+                    restart_limit = int(restart_limit * self.restart_growth)
+                    self.backtrack(0)
+                continue
+            var = self.pick_branch()
+            if var is None:
+                model = [value == 1 for value in self.values]
+                self.backtrack(0)
+                return model
+            self.decide(var if self.phase[var] else -var)
+
+    def count_models(self, count_vars, root):
+        '''
+        Counts the assignments of the variables in `count_vars` that make
+        the literal `root` true. The formula must be a circuit, like the
+        output of `tseitin` without its root asserted: every other
+        variable is determined by `count_vars`, so unit propagation alone
+        evaluates the circuit as far as the assigned inputs allow.
+
+        Inputs are branched on in the order given, and a branch stops as
+        soon as `root` is known. Branches that leave the same residual
+        formula are counted once (see `track_residual`).
+        '''
+        if not self.ok:
+            return 0
+        self.backtrack(0)
+        count_vars = list(count_vars)
+        self.track_residual(count_vars)
+        try:
+            if self.propagate() is not None:
+                return 0
+            return self.count_from(count_vars, root)
+        finally:
+            self.residual_hash = None
+
+    def count_from(self, count_vars, root):
+        '''
+        Counts the models below the current decision level. The search
+        keeps its own stack of frames rather than recursing, so circuits
+        with thousands of inputs do not hit Python's recursion limit.
+        '''
+        memo = {}
+        # Per open node: [memo key, decision level, input, depth, count so
+        # far, branches tried]
+        frames = []
+        depth = 0
+        while True:
+            count, depth, key = self.visit(count_vars, depth, root, memo)
+            if count is None:
+                frames.append([key, len(self.trail_lim), count_vars[depth],
+                               depth, 0, 0])
+            # Hand finished counts up until a node has a branch left
+            while True:
+                if count is not None:
+                    if not frames:
+                        return count
+                    frame = frames[-1]
+                    frame[4] += count
+                    self.backtrack(frame[1])
+                    count = None
+                frame = frames[-1]
+                if frame[5] == 2:
+                    memo[frame[0]] = count = frame[4]
+                    frames.pop()
+                    continue
+                lit = frame[2] if frame[5] == 0 else -frame[2]
+                frame[5] += 1
+                self.decide(lit)
+                if self.propagate() is None:
+                    depth = frame[3] + 1
+                    break
+                self.backtrack(frame[1])
+
+    def visit(self, count_vars, depth, root, memo):
+        '''
+        Looks at the node of the search at `depth`. Returns `(count,
+        depth, key)`, where `count` is None if the node must be branched
+        on, `depth` skips the inputs already assigned and `key` is its
+        memo key.
+        '''
+        while depth < len(count_vars) and self.values[count_vars[depth]]:
+            depth += 1
+        value = self.lit_value(root)
+        if value:
+            if value == -1:
+                return 0, depth, None
+            # Every input still unassigned is free
+            return 1 << (len(count_vars) - self.assigned_inputs), depth, None
+        if depth == len(count_vars):
+            # Only happens if the formula is not a circuit over count_vars
+            return 0, depth, None
+        key = (depth, self.residual_hash)
+        return memo.get(key), depth, key
+
+    def track_residual(self, count_vars):
+        '''
+        Starts keeping `residual_hash` up to date as literals are assigned
+        and unassigned. It describes what is left of the formula: which
+        original clauses are satisfied, and which literals of the others
+        are false. Each is given a random 128-bit value and the hash is
+        the XOR of the current ones, so updating it costs no more than
+        propagating the literal. Also counts the `assigned_inputs`.
+        '''
+        rng = random.Random(0)
+        self.sat_counts = [0] * self.num_original
+        self.false_hashes = [0] * self.num_original
+        self.sat_keys = [rng.getrandbits(128)
+                         for _ in range(self.num_original)]
+        # Literal -> (clause index, key) of each original clause it is in
+        self.occurs = {}
+        for index in range(self.num_original):
+            for lit in self.clauses[index]:
+                self.occurs.setdefault(lit, []).append(
+                    (index, rng.getrandbits(128)))
+        self.is_input = [False] * (self.num_vars + 1)
+        for var in count_vars:
+            self.is_input[var] = True
+        self.assigned_inputs = 0
+        self.residual_hash = 0
+        for lit in self.trail:
+            self.hash_assign(lit)
+
+    def hash_assign(self, lit):
+        '''Updates `residual_hash` now that `lit` is true'''
+        sat_counts = self.sat_counts
+        false_hashes = self.false_hashes
+        residual_hash = self.residual_hash
+        for index, _ in self.occurs.get(lit, ()):
+            sat_counts[index] += 1
+            if sat_counts[index] == 1:
+                # Newly satisfied, its false literals no longer matter
+                residual_hash ^= self.sat_keys[index] ^ false_hashes[index]
+        for index, key in self.occurs.get(-lit, ()):
+            false_hashes[index] ^= key
+            if not sat_counts[index]:
+                residual_hash ^= key
+        self.residual_hash = residual_hash
+        if self.is_input[abs(lit)]:
+            self.assigned_inputs += 1
+
+    def hash_unassign(self, lit):
+        '''Undoes `hash_assign` for `lit`'''
+        sat_counts = self.sat_counts
+        false_hashes = self.false_hashes
+        residual_hash = self.residual_hash
+        for index, key in self.occurs.get(-lit, ()):
+            false_hashes[index] ^= key
+            if not sat_counts[index]:
+                residual_hash ^= key
+        for index, _ in self.occurs.get(lit, ()):
+            if sat_counts[index] == 1:
+                residual_hash ^= self.sat_keys[index] ^ false_hashes[index]
+            sat_counts[index] -= 1
+        self.residual_hash = residual_hash
+        if self.is_input[abs(lit)]:
+            self.assigned_inputs -= 1
+
+def solve_exp(exp, long_names=False):
+    '''
+    Returns a dictionary of variable values making the expression string
+    `exp` true, or None if it can never be true.
+    '''
+    clauses, var_ids, num_vars, root = tseitin(BooleanExpr(exp, long_names))
+    model = SatSolver(num_vars, clauses + [[root]]).solve()
+    if model is None:
+        return None
+    return dict((var, model[var_id]) for var, var_id in var_ids.items())
+
+def count_models(exp, long_names=False):
+    '''
+    Returns how many assignments make the expression string `exp` true.
+    Inputs are branched on in the order they appear in the expression.
+    '''
+    exp_obj = BooleanExpr(exp, long_names)
+    clauses, var_ids, num_vars, root = tseitin(exp_obj)
+    order = [var_ids[var] for var in order_variables([exp_obj])]
+    return SatSolver(num_vars, clauses).count_models(order, root)
@@ -0,0 +1,333 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+Replays a memory trace through a TLB and a page table, using the page
+numbers of a chip described by an AddressParser. Both are fixed-size sets
+of pages with a replacement policy ("lru", "fifo", "clock" or "random"),
+and every access is O(1). Traces are streamed a chunk at a time (see
+`address_trace`), and `sweep` compares configurations in parallel.
+
+An access that hits the TLB is done. A TLB miss walks the page table,
+and if the page is not resident that is a page fault: the page is loaded,
+evicting a victim whose TLB entry is then invalidated.
+'''
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import random
+
+from .address_trace import CHUNK_BYTES, decode_trace
+
+class LRUReplacement(object):
+    '''Evicts the page used longest ago'''
+    def __init__(self, capacity, seed=None):
+        '''Holds at most `capacity` pages'''
+        self.capacity = capacity
+        self.pages = OrderedDict()
+
+    def touch(self, page):
+        '''Returns True if `page` is held, marking it as used'''
+        if page in self.pages:
+            self.pages.move_to_end(page)
+            return True
+        return False
+
+    def insert(self, page):
+        '''Adds `page` (which is not held), returns the evicted page'''
+        evicted = None
+        if len(self.pages) >= self.capacity:
+            evicted = self.pages.popitem(last=False)[0]
+        self.pages[page] = None
+        return evicted
+
+    def remove(self, page):
+        '''Drops `page` if it is held'''
+        self.pages.pop(page, None)
+
+    def __len__(self):
+        return len(self.pages)
+
+class FIFOReplacement(LRUReplacement):
+    '''Evicts the page loaded longest ago'''
+    def touch(self, page):
+        '''Returns True if `page` is held'''
+        return page in self.pages
+
+class ClockReplacement(object):
+    '''
+    Second chance: a hand sweeps the slots, clearing reference bits, and
+    evicts the first page that has not been used since it last passed.
+    '''
+    def __init__(self, capacity, seed=None):
+        '''Holds at most `capacity` pages'''
+        self.capacity = capacity
+        self.keys = [None] * capacity
+        self.refs = bytearray(capacity)
+        self.slots = {}
+        self.free = list(range(capacity - 1, -1, -1))
+        self.hand = 0
+
+    def touch(self, page):
+        '''Returns True if `page` is held, setting its reference bit'''
+        slot = self.slots.get(page)
+        if slot is None:
+            return False
+        self.refs[slot] = 1
+        return True
+
+    def insert(self, page):
+        '''Adds `page` (which is not held), returns the evicted page'''
+        evicted = None
+        if self.free:
+            slot = self.free.pop()
+        else:
+            refs = self.refs
+            while refs[self.hand]:
+                refs[self.hand] = 0
+                self.hand = (self.hand + 1) % self.capacity
+            slot = self.hand
+            self.hand = (slot + 1) % self.capacity
+            evicted = self.keys[slot]
+            del self.slots[evicted]
+        self.keys[slot] = page
+        self.refs[slot] = 1
+        self.slots[page] = slot
+        return evicted
+
+    def remove(self, page):
+        '''Drops `page` if it is held, freeing its slot'''
+        slot = self.slots.pop(page, None)
+        if slot is not None:
+            self.keys[slot] = None
+            self.refs[slot] = 0
+            self.free.append(slot)
+
+    def __len__(self):
+        return len(self.slots)
+
+class RandomReplacement(object):
+    '''Evicts a page picked at random (reproducibly, from `seed`)'''
+    def __init__(self, capacity, seed=None):
+        '''Holds at most `capacity` pages'''
+        self.capacity = capacity
+        self.keys = []
+        self.slots = {}
+        self.rng = random.Random(seed)
+
+    def touch(self, page):
+        '''Returns True if `page` is held'''
+        return page in self.slots
+
+    def insert(self, page):
+        '''Adds `page` (which is not held), returns the evicted page'''
+        if len(self.keys) < self.capacity:
+            self.slots[page] = len(self.keys)
+            self.keys.append(page)
+            return None
+        slot = self.rng.randrange(self.capacity)
+        evicted = self.keys[slot]
+        del self.slots[evicted]
+        self.keys[slot] = page
+        self.slots[page] = slot
+        return evicted
+
+    def remove(self, page):
+        '''Drops `page` if it is held, moving the last page into its slot'''
+        slot = self.slots.pop(page, None)
+        if slot is None:
+            return
+        last = self.keys.pop()
+        if slot < len(self.keys):
+            self.keys[slot] = last
+            self.slots[last] = slot
+
+    def __len__(self):
+        return len(self.keys)
+
+class UnboundedFrames(object):
+    '''Physical memory with room for every page, so only first use faults'''
+    def __init__(self):
+        '''No page is resident yet'''
+        self.pages = set()
+
+    def touch(self, page):
+        '''Returns True if `page` is resident'''
+        return page in self.pages
+
+    def insert(self, page):
+        '''Loads `page`, nothing is ever evicted'''
+        self.pages.add(page)
+
+    def remove(self, page):
+        '''Unloads `page`'''
+        self.pages.discard(page)
+
+    def __len__(self):
+        return len(self.pages)
+
+POLICIES = {
+    "lru": LRUReplacement,
+    "fifo": FIFOReplacement,
+    "clock": ClockReplacement,
+    "random": RandomReplacement,
+}
+
+def make_policy(policy, capacity, seed=None):
+    '''Creates the replacement policy named `policy`'''
+    if policy not in POLICIES:
+        raise ValueError("Unknown replacement policy: {}".format(policy))
+    if capacity < 1:
+        raise ValueError("Capacity must be at least 1")
+    return POLICIES[policy](capacity, seed)
+
+class TLBSimulator(object):
+    '''
+    Simulates a TLB of `tlb_entries` entries in front of a page table
+    with `frames` physical frames (None for as many as there are pages)
+    for the AddressParser `chip`. Per-interval counts are kept every
+    `interval` accesses if it is given.
+    '''
+    def __init__(self, chip, tlb_entries=64, tlb_policy="lru", frames=None,
+                 page_policy="lru", interval=None, seed=0):
+        '''Starts with an empty TLB and no resident pages'''
+        self.chip = chip
+        self.tlb = make_policy(tlb_policy, tlb_entries, seed)
+        if frames is None:
+            self.frames = UnboundedFrames()
+        else:
+            self.frames = make_policy(page_policy, frames, seed)
+        self.interval = interval
+        self.accesses = 0
+        self.tlb_hits = 0
+        self.page_faults = 0
+        self.invalid = 0
+        self.intervals = []
+        self.next_mark = interval
+        self.last_counts = (0, 0, 0)
+
+    def access_page(self, page):
+        '''Simulates one access to `page`, returns True on a TLB hit'''
+        self.accesses += 1
+        hit = self.tlb.touch(page)
+        # The page table sees every reference, for LRU and CLOCK
+        resident = self.frames.touch(page)
+        if hit:
+            self.tlb_hits += 1
+        else:
+            if not resident:
+                self.page_faults += 1
+                victim = self.frames.insert(page)
+                if victim is not None:
+                    self.tlb.remove(victim)
+            self.tlb.insert(page)
+        if self.accesses == self.next_mark:
+            self.mark_interval()
+        return hit
+
+    def mark_interval(self):
+        '''Records the counts since the previous interval'''
+        counts = (self.accesses, self.tlb_hits, self.page_faults)
+        accesses, hits, faults = [now - last for now, last in
+                                  zip(counts, self.last_counts)]
+        self.intervals.append({
+            "end": self.accesses,
+            "accesses": accesses,
+            "tlb_hits": hits,
+            "tlb_misses": accesses - hits,
+            "page_faults": faults,
+        })
+        self.last_counts = counts
+        self.next_mark += self.interval
+
+    def access(self, address):
+        '''
+        Simulates one access to the absolute `address`. Returns True on a
+        TLB hit, False on a miss and None if the address is invalid.
+        '''
+        if not self.chip.is_valid_address(address):
+            self.invalid += 1
+            return None
+        return self.access_page(address >> self.chip.page_shift)
+
+    def run(self, addresses):
+        '''Simulates every address of an iterable, returns `get_stats`'''
+        for address in addresses:
+            self.access(address)
+        return self.get_stats()
+
+    def run_trace(self, path, binary=False, word_bytes=4,
+                  chunk_bytes=CHUNK_BYTES):
+        '''
+        Streams the trace file at `path` (see `address_trace`) through
+        the simulator, returns `get_stats`.
+        '''
+        access_page = self.access_page
+        for _, _, pages, _, _, invalid in decode_trace(
+                path, self.chip, binary, word_bytes, chunk_bytes):
+            if not isinstance(pages, list):
+                pages = pages.tolist()
+            if len(invalid):
+                self.invalid += len(invalid)
+                bad = set(int(i) for i in invalid)
+                pages = [page for i, page in enumerate(pages)
+                         if i not in bad]
+            for page in pages:
+                access_page(page)
+        return self.get_stats()
+
+    def get_stats(self):
+        '''The counts so far as a dict'''
+        misses = self.accesses - self.tlb_hits
+        return {
+            "accesses": self.accesses,
+            "tlb_hits": self.tlb_hits,
+            "tlb_misses": misses,
+            "page_faults": self.page_faults,
+            "invalid": self.invalid,
+            "tlb_hit_rate": self.tlb_hits / self.accesses
+                            if self.accesses else 0.0,
+            "fault_rate": self.page_faults / self.accesses
+                          if self.accesses else 0.0,
+            "intervals": list(self.intervals),
+        }
+
+def sweep_job(config, path, chip, binary, word_bytes):
+    '''Runs one configuration of `sweep` over the whole trace'''
+    simulator = TLBSimulator(chip, **config)
+    stats = simulator.run_trace(path, binary, word_bytes)
+    stats["config"] = config
+    return stats
+
+def sweep(path, chip, configs, binary=False, word_bytes=4, executor=None,
+          max_workers=None):
+    '''
+    Replays the trace at `path` once per configuration in `configs`
+    (dicts of `TLBSimulator` arguments), returning the stats of each in
+    order. Every run streams the trace itself, so `executor` can be None
+    (run here), "process" for a pool of `max_workers` processes, or any
+    `concurrent.futures.Executor`.
+    '''
+    configs = list(configs)
+    args = (repeat(path), repeat(chip), repeat(binary), repeat(word_bytes))
+    if executor is None:
+        return list(map(sweep_job, configs, *args))
+    if executor == "process":
+        with ProcessPoolExecutor(max_workers) as pool:
+            return list(pool.map(sweep_job, configs, *args))
+    return list(executor.map(sweep_job, configs, *args))
@@ -0,0 +1,194 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+A compact binary file format for truth tables. The file holds a header
+(the expression, the variable order and the row count) followed by the
+output column packed 1 bit per row, so a 30 variable table is 128 MiB.
+Tables are read through `mmap`, so lookups, popcounts and range queries
+never load the whole column.
+
+Layout (all integers little-endian):
+    header       HEADER, see below
+    expression   `exp_len` bytes of UTF-8
+    variables    `names_len` bytes of UTF-8, names separated by spaces
+    padding      zeros up to `data_offset`, a multiple of 8
+    data         bit i of byte j is the result of row 8 * j + i
+'''
+import mmap
+import struct
+
+from .boolean_expr_parser import BooleanExpr, popcount
+
+# Identifies a packed truth-table file
+MAGIC = b"BXTT"
+VERSION = 1
+# magic, version, flags, exp_len, names_len, row_count, data_offset
+HEADER = struct.Struct("<4sHHIIQQ")
+# Flag set when the expression uses long variable names
+FLAG_LONG_NAMES = 1
+# Bytes read at a time when scanning the data
+CHUNK_BYTES = 1 << 20
+
+def write_packed(exp_obj, path, block_vars=16):
+    '''
+    Writes the truth table of a BooleanExpr to `path`. The table is
+    evaluated `2 ** block_vars` rows at a time, so memory stays bounded.
+    Returns False (and writes nothing) if the expression is invalid.
+    '''
+    if not exp_obj.validate():
+        return False
+    var_list = exp_obj.get_var_list()
+    exp_bytes = exp_obj.disp_exp.encode("utf-8")
+    names_bytes = " ".join(var_list).encode("utf-8")
+    data_offset = HEADER.size + len(exp_bytes) + len(names_bytes)
+    data_offset += -data_offset % 8
+    flags = FLAG_LONG_NAMES if exp_obj.long_names else 0
+    with open(path, "wb") as table_file:
+        table_file.write(HEADER.pack(MAGIC, VERSION, flags, len(exp_bytes),
+                                     len(names_bytes), 1 << len(var_list),
+                                     data_offset))
+        table_file.write(exp_bytes)
+        table_file.write(names_bytes)
+        table_file.write(b"\0" * (data_offset - table_file.tell()))
+        # Blocks are at least 8 rows, except for tables smaller than that
+        for _, block_mask, rows in exp_obj.iter_result_blocks(
+                max(block_vars, 3)):
+            table_file.write(int_to_bytes(block_mask, (rows + 7) // 8))
+    return True
+
+def int_to_bytes(num, length):
+    '''Packs `num` into `length` bytes, least significant first'''
+    return num.to_bytes(length, "little")
+
+class PackedTruthTable(object):
+    '''
+    Read-only, memory-mapped view of a file written by `write_packed`.
+    To count the rows of a stored table that are true, we would do:
+    >>> with PackedTruthTable("table.bxtt") as table:
+    ...     print(table.popcount())
+    '''
+    # The expression as it was displayed
+    disp_exp = ""
+    # Variables in column order, the first is the most significant bit
+    var_list = None
+    # Number of rows in the table
+    row_count = 0
+    long_names = False
+
+    def __init__(self, path):
+        '''Opens and maps the table at `path`, checking its header'''
+        self.table_file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.table_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        except ValueError:
+            self.table_file.close()
+            raise ValueError("{} is not a packed truth table".format(path))
+        try:
+            self.read_header(path)
+        except ValueError:
+            self.close()
+            raise
+
+    def read_header(self, path):
+        '''
+        Reads the header, raising ValueError if the file is not a packed
+        truth table or is cut short.
+        '''
+        if len(self.data) < HEADER.size or \
+                self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError("{} is not a packed truth table".format(path))
+        (_, version, flags, exp_len, names_len, self.row_count,
+         self.data_offset) = HEADER.unpack_from(self.data, 0)
+        if version != VERSION:
+            raise ValueError("{} is version {} of the format, not {}".format(
+                path, version, VERSION))
+        if self.data_offset < HEADER.size + exp_len + names_len or \
+                len(self.data) < self.data_offset + (self.row_count + 7) // 8:
+            raise ValueError("{} is truncated".format(path))
+        start = HEADER.size
+        self.disp_exp = self.data[start:start + exp_len].decode("utf-8")
+        start += exp_len
+        names = self.data[start:start + names_len].decode("utf-8")
+        self.var_list = names.split()
+        self.long_names = bool(flags & FLAG_LONG_NAMES)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.row_count
+
+    def close(self):
+        '''Unmaps and closes the file'''
+        self.data.close()
+        self.table_file.close()
+
+    def to_expr(self):
+        '''Parses the stored expression again as a BooleanExpr'''
+        return BooleanExpr(self.disp_exp, self.long_names)
+
+    def get_row(self, dict_bool):
+        '''Returns the row number for the variable values in `dict_bool`'''
+        row = 0
+        for var in self.var_list:
+            row = (row << 1) | int(bool(dict_bool[var]))
+        return row
+
+    def value(self, row):
+        '''Returns the result of row number `row`'''
+        if not 0 <= row < self.row_count:
+            raise IndexError("Row {} is out of range".format(row))
+        return bool(self.data[self.data_offset + row // 8] >> (row % 8) & 1)
+
+    def value_at(self, dict_bool):
+        '''Returns the result for the variable values in `dict_bool`'''
+        return self.value(self.get_row(dict_bool))
+
+    def get_range(self, start, stop):
+        '''
+        Returns the results of rows `start` up to `stop` as a mask, where
+        bit i is the result of row `start + i`.
+        '''
+        start = max(start, 0)
+        stop = min(stop, self.row_count)
+        if start >= stop:
+            return 0
+        first = self.data_offset + start // 8
+        last = self.data_offset + (stop + 7) // 8
+        mask = int.from_bytes(self.data[first:last], "little")
+        return (mask >> (start % 8)) & ((1 << (stop - start)) - 1)
+
+    def popcount(self, start=0, stop=None):
+        '''
+        Counts the true rows from `start` up to `stop` (the whole table by
+        default), reading at most CHUNK_BYTES of the file at a time.
+        '''
+        if stop is None:
+            stop = self.row_count
+        total = 0
+        chunk_rows = CHUNK_BYTES * 8
+        while start < stop:
+            chunk_stop = min(stop, start - start % chunk_rows + chunk_rows)
+            total += popcount(self.get_range(start, chunk_stop))
+            start = chunk_stop
+        return total
@@ -0,0 +1,103 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+Indexes boolean expressions by the truth table they produce, so checking
+for equivalent or duplicate expressions is a hash lookup.
+'''
+import json
+
+from .boolean_expr_parser import BooleanExpr
+
+class SignatureIndex(object):
+    '''
+    Maps truth-table signatures (see `BooleanExpr.get_signature`) to the
+    expressions that produce them. To find which expressions are the
+    same function, we would do the following:
+    >>> index = SignatureIndex()
+    >>> for exp in ["A+B", "B+A", "!(!A*!B)", "A*B"]:
+    ...     index.add(exp)
+    >>> print(index.duplicates())
+    '''
+    # Signature -> list of expressions with that signature
+    index = None
+    # Expressions that could not be indexed -> their error message
+    invalid = None
+
+    def __init__(self, long_names=False):
+        '''Creates an empty index, `long_names` is passed to BooleanExpr'''
+        self.index = {}
+        self.invalid = {}
+        self.long_names = long_names
+
+    def add(self, exp):
+        '''
+        Adds the expression string `exp` to the index. Returns its
+        signature, or None if the expression is invalid.
+        '''
+        exp_obj = BooleanExpr(exp, self.long_names)
+        signature = exp_obj.get_signature()
+        if signature is None:
+            self.invalid[exp] = exp_obj.error_msg
+            return None
+        self.index.setdefault(signature, []).append(exp)
+        return signature
+
+    def add_many(self, exps):
+        '''Adds every expression string in `exps` to the index'''
+        for exp in exps:
+            self.add(exp)
+
+    def find_equivalent(self, exp):
+        '''Returns the indexed expressions equivalent to `exp`'''
+        signature = BooleanExpr(exp, self.long_names).get_signature()
+        return list(self.index.get(signature, []))
+
+    def duplicates(self):
+        '''Returns the groups of indexed expressions that are equivalent'''
+        return [exps for exps in self.index.values() if len(exps) > 1]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, exp):
+        return bool(self.find_equivalent(exp))
+
+    def save(self, path):
+        '''Writes the index to `path` as JSON, masks are stored in hex'''
+        entries = []
+        for (var_list, result_mask), exps in self.index.items():
+            entries.append({
+                "vars": list(var_list),
+                "mask": hex(result_mask),
+                "exps": exps,
+            })
+        with open(path, 'w') as index_file:
+            json.dump({"long_names": self.long_names, "entries": entries},
+                      index_file)
+
+    @classmethod
+    def load(cls, path):
+        '''Reads an index written by `save`'''
+        with open(path) as index_file:
+            data = json.load(index_file)
+        sig_index = cls(data["long_names"])
+        for entry in data["entries"]:
+            signature = (tuple(entry["vars"]), int(entry["mask"], 16))
+            sig_index.index[signature] = entry["exps"]
+        return sig_index
@@ -0,0 +1,211 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+
+An asyncio front end that answers truth-table requests for the chat bot.
+Identical requests that arrive while a table is being built wait on the
+same computation, tables are built in an executor pool so the event loop
+stays responsive, and finished tables are kept in an LRU cache keyed by
+the expression as it was sent.
+
+Two interfaces are offered:
+    HTTP:  GET /table?exp=A*B%2BC     -> the table as text/plain
+    lines: {"exp": "A*B+C"}           -> {"table": "...", "error": null}
+(the line protocol is JSON, one request per line, over a unix or TCP
+socket). Run with `python -m src.truth_table_service --port 8080`.
+'''
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from .boolean_expr_parser import LRUCache, truth_table_job
+
+# Longest request line or header we accept from a client
+MAX_LINE = 65536
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+
+class TruthTableService(object):
+    '''
+    Builds truth tables on request. `executor` is a
+    `concurrent.futures.Executor`, "thread" or "process" (the default,
+    since building a table is CPU-bound) with `max_workers` workers.
+    Up to `cache_size` tables are cached, each for at most `max_vars`
+    variables (see `get_truth_table`).
+    '''
+    def __init__(self, executor="process", max_workers=None,
+                 cache_size=256, max_vars=5):
+        '''Creates the pool and an empty cache'''
+        self.owns_executor = executor in ("thread", "process")
+        if executor == "thread":
+            executor = ThreadPoolExecutor(max_workers)
+        elif executor == "process":
+            executor = ProcessPoolExecutor(max_workers)
+        self.executor = executor
+        self.cache = LRUCache(cache_size)
+        self.max_vars = max_vars
+        # Tables being built, keyed like the cache
+        self.pending = {}
+        # Requests answered by joining a table already being built
+        self.coalesced = 0
+        # Tables actually built
+        self.computed = 0
+
+    async def get_table(self, exp):
+        '''
+        Returns `(table, error_msg)` for `exp`, see `truth_table_job`.
+        Requests are matched on their exact text, since the header, the
+        column widths and error columns all come from it. The parse is
+        still shared between spellings through `COMPILED_EXPS`.
+        '''
+        cached = self.cache.get(exp)
+        if cached is not None:
+            return cached
+        future = self.pending.get(exp)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, truth_table_job, exp,
+                                      self.max_vars)
+        self.pending[exp] = future
+        self.computed += 1
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            del self.pending[exp]
+        self.cache.put(exp, result)
+        return result
+
+    def get_stats(self):
+        '''Counters for monitoring the service'''
+        return {
+            "cached": len(self.cache),
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+            "coalesced": self.coalesced,
+            "computed": self.computed,
+            "pending": len(self.pending),
+        }
+
+    async def handle_lines(self, reader, writer):
+        '''Answers JSON requests, one per line, until the client leaves'''
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    exp = json.loads(line)["exp"]
+                except (ValueError, KeyError, TypeError):
+                    table, error = None, "Request must be {\"exp\": ...}"
+                else:
+                    table, error = await self.get_table(str(exp))
+                reply = {"table": table, "error": error}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def handle_http(self, reader, writer):
+        '''Answers a single HTTP request, then closes the connection'''
+        try:
+            request = await reader.readline()
+            # Skip the headers, we do not need any of them
+            while (await reader.readline()).strip():
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                status, body = 400, "Only GET is supported"
+            else:
+                url = urlsplit(parts[1])
+                exps = parse_qs(url.query).get("exp")
+                if url.path == "/stats":
+                    status, body = 200, json.dumps(self.get_stats())
+                elif url.path != "/table":
+                    status, body = 404, "Unknown path"
+                elif not exps:
+                    status, body = 400, "Missing `exp` parameter"
+                else:
+                    table, error = await self.get_table(exps[0])
+                    status, body = (200, table) if error is None \
+                        else (400, error)
+            body = body.encode()
+            writer.write("HTTP/1.0 {} {}\r\n".format(
+                status, HTTP_REASONS[status]).encode())
+            writer.write(b"Content-Type: text/plain; charset=utf-8\r\n")
+            writer.write("Content-Length: {}\r\n\r\n".format(
+                len(body)).encode())
+            writer.write(body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def start_http(self, host="127.0.0.1", port=8080):
+        '''Starts the HTTP interface and returns the server'''
+        return await asyncio.start_server(self.handle_http, host, port,
+                                          limit=MAX_LINE)
+
+    async def start_lines(self, path=None, host="127.0.0.1", port=8081):
+        '''
+        Starts the line interface on the unix socket `path`, or on TCP if
+        no path is given, and returns the server.
+        '''
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle_lines, path,
+                                                   limit=MAX_LINE)
+        return await asyncio.start_server(self.handle_lines, host, port,
+                                          limit=MAX_LINE)
+
+    def close(self):
+        '''Shuts down the pool if the service created it'''
+        if self.owns_executor:
+            self.executor.shutdown()
+
+async def serve(args):
+    '''Runs the interfaces picked on the command line until cancelled'''
+    service = TruthTableService(args.executor, args.workers,
+                                args.cache_size, args.max_vars)
+    servers = [await service.start_http(args.host, args.port)]
+    if args.unix:
+        servers.append(await service.start_lines(args.unix))
+    try:
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+    finally:
+        service.close()
+
+def main(argv=None):
+    '''Command line entry point'''
+    parser = argparse.ArgumentParser(description="Truth table service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", help="also serve JSON lines on this socket")
+    parser.add_argument("--executor", choices=["thread", "process"],
+                        default="process")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--cache-size", type=int, default=256)
+    parser.add_argument("--max-vars", type=int, default=5)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+
+import os
+import struct
+import tempfile
+
+from ..src.address_trace import decode_trace, iter_text_addresses, \
+    summarize_trace
+from ..src.page_address_calc import AddressParser
+
+def test_decode_address():
+    '''Addresses split into their fields, unless out of the chip'''
+    addy = AddressParser(3, 4, 5)
+    assert addy.decode_address(0b101_0110_10011) == (5, 6, 19)
+    assert addy.decode_address("0xFFF") == (7, 15, 31)
+    assert addy.decode_address(0x1000) == "Invalid address"
+    assert addy.decode_address(-1) == "Invalid address"
+    start, end = addy.get_start_end(6)
+    assert addy.decode_address(start) == (6, 0, 0)
+    assert addy.decode_address(end) == (6, 15, 31)
+
+def test_text_and_binary_traces():
+    '''Both trace formats decode the same, across chunk boundaries'''
+    addy = AddressParser(4, 4, 2)
+    addresses = [(i * 37) % 1100 for i in range(500)]
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, "trace.txt")
+        bin_path = os.path.join(tmp, "trace.bin")
+        with open(text_path, "w") as trace_file:
+            trace_file.write("\n".join(hex(a) for a in addresses) + "\n")
+        with open(bin_path, "wb") as trace_file:
+            trace_file.write(struct.pack("<500I", *addresses))
+        text = summarize_trace(text_path, addy, chunk_bytes=64)
+        binary = summarize_trace(bin_path, addy, binary=True, chunk_bytes=64)
+        chunks = list(decode_trace(text_path, addy, chunk_bytes=64))
+    expected_invalid = [i for i, a in enumerate(addresses) if a >= 1024]
+    assert text["addresses"] == binary["addresses"] == 500
+    assert text["invalid"] == binary["invalid"] == expected_invalid
+    assert text["pages"] == binary["pages"]
+    assert sum(text["pages"].values()) == 500 - len(expected_invalid)
+    decoded = [tuple(int(field[i]) for field in chunk[2:5])
+               for chunk in chunks for i in range(len(chunk[1]))]
+    assert decoded[:3] == [addy.decode_address(a) for a in addresses[:3]]
+    assert [chunk[0] for chunk in chunks][:2] == [0, len(chunks[0][1])]
+
+def test_single_line_trace_is_chunked():
+    '''Addresses on one line still stream in bounded chunks'''
+    addresses = [(i * 7919) % 4096 for i in range(300)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.txt")
+        with open(path, "w") as trace_file:
+            trace_file.write(" ".join(hex(a) for a in addresses))
+        chunks = [list(chunk) for chunk in iter_text_addresses(path, 16)]
+    assert len(chunks) > 50
+    assert max(len(chunk) for chunk in chunks) <= 4
+    assert [a for chunk in chunks for a in chunk] == addresses
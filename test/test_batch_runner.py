@@ -0,0 +1,102 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+
+import io
+import json
+import os
+import tempfile
+
+from ..src import batch_runner
+from ..src.batch_runner import ResultCache, main, read_jobs, run_batch
+from ..src.boolean_expr_parser import BooleanExpr
+
+JOBS = [
+    {"id": 1, "type": "truth_table", "exp": "A*B+!C"},
+    {"id": 2, "type": "page", "page_bits": 4, "offs_bits": 4,
+     "byte_bits": 0, "page": 15},
+    {"id": 3, "type": "page", "page_bits": 4, "offs_bits": 4,
+     "byte_bits": 0, "page": 16},
+    {"id": 4, "type": "truth_table", "exp": "A**B"},
+    {"id": 5, "type": "cache_line"},
+]
+
+def test_run_batch_in_order():
+    '''Results come back in order, errors included, from the cache too'''
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(tmp)
+        first = list(run_batch(JOBS * 20, "process", 2, cache, chunksize=7,
+                               window=2))
+        cache = ResultCache(tmp)
+        again = list(run_batch(JOBS, cache=cache))
+    assert [record["id"] for record in first] == [1, 2, 3, 4, 5] * 20
+    assert first[0]["result"] == BooleanExpr("A*B+!C").get_truth_table()
+    assert first[1]["result"] == ['0xF0', '0xFF']
+    assert first[2]["error"] == "Invalid page number"
+    assert first[3]["error"] and first[4]["error"]
+    assert again == first[:5]
+    assert cache.hits == 4
+
+def test_csv_cli():
+    '''CSV jobs run from the command line'''
+    text = ("id,type,exp,page_bits,offs_bits,byte_bits,page\n"
+            "a,page,,3,4,5,7\nb,truth_table,A+B,,,,\n")
+    assert list(read_jobs(io.StringIO(text), "csv"))[1] == \
+        {"id": "b", "type": "truth_table", "exp": "A+B"}
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = os.path.join(tmp, "jobs.csv")
+        out = os.path.join(tmp, "out.jsonl")
+        with open(jobs, "w") as job_file:
+            job_file.write(text)
+        main([jobs, "--workers", "0", "--output", out])
+        with open(out) as out_file:
+            records = [json.loads(line) for line in out_file]
+    assert records[0] == {"id": "a", "type": "page", "error": None,
+                          "result": ['0xE00', '0xFFF']}
+    assert records[1]["result"] == BooleanExpr("A+B").get_truth_table()
+
+def test_unlimited_and_long_names():
+    '''A null `max_vars` asks for the whole table, long names work'''
+    exp = "in_0 * in_1 + in_2 + in_3 + in_4 + in_5"
+    jobs = [{"type": "truth_table", "exp": exp, "long_names": True},
+            {"type": "truth_table", "exp": exp, "long_names": True,
+             "max_vars": None}]
+    records = list(run_batch(jobs))
+    assert records[0]["error"].startswith("Too many variables!")
+    assert records[1]["result"] == \
+        BooleanExpr(exp, long_names=True).get_truth_table(None)
+
+def test_failed_jobs_are_retried():
+    '''Results of jobs that raised are not cached'''
+    job = {"type": "page", "page_bits": 4, "offs_bits": 4, "byte_bits": 0,
+           "page": 3}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(tmp)
+        original = batch_runner.run_job
+        batch_runner.run_job = lambda job: 1 // 0
+        try:
+            failed = list(run_batch([job], cache=cache))
+        finally:
+            batch_runner.run_job = original
+        retried = list(run_batch([job], cache=cache))
+        cached = list(run_batch([job], cache=cache))
+    assert failed[0]["error"].startswith("ZeroDivisionError")
+    assert retried[0]["result"] == ['0x30', '0x3F']
+    assert cached == retried and cache.hits == 1
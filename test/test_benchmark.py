@@ -0,0 +1,40 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+
+from ..src.benchmark import compare, run_benchmarks
+
+def test_quick_report():
+    '''Every benchmark reports a positive rate'''
+    sizes = {"parse": [10], "row_eval": [4], "bit_sliced": [4],
+             "format": [4], "address": [4], "address_many": [4]}
+    report = run_benchmarks(sizes, repeat=1)
+    assert len(report["results"]) == 6
+    for res in report["results"]:
+        assert res["ops"] > 0 and res["seconds"] >= 0
+
+def test_compare_flags_slowdown():
+    '''Only benchmarks past the threshold are regressions'''
+    base = {"results": [{"name": "parse", "size": 10, "seconds": 1.0},
+                        {"name": "format", "size": 4, "seconds": 1.0}]}
+    new = {"results": [{"name": "parse", "size": 10, "seconds": 1.5},
+                       {"name": "format", "size": 4, "seconds": 1.05},
+                       {"name": "address", "size": 4, "seconds": 9.0}]}
+    assert compare(base, new) == [("parse", 10, 1.5)]
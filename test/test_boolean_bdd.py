@@ -0,0 +1,52 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+from ..src.boolean_expr_parser import BooleanExpr
+from ..src.boolean_bdd import BDD, FALSE, build_bdds, equivalent, \
+    order_variables
+
+def test_sat_count_matches_truth_table():
+    '''Model counts agree with the truth table'''
+    for exp in ["A*B + C", "A^B^C^D", "!(A+B)*(C^!D) + A*!C"]:
+        exp_obj = BooleanExpr(exp)
+        bdd = BDD(order_variables([exp_obj], "sorted"))
+        node = bdd.build(exp_obj)
+        assert bdd.sat_count(node) == exp_obj.count_true()
+        dict_bool = dict.fromkeys(exp_obj.var_set, False)
+        dict_bool.update(bdd.any_sat(node))
+        assert exp_obj.get_row_result(dict_bool)
+
+def test_many_variables():
+    '''A 200 variable parity function stays small'''
+    names = ["x{}".format(i) for i in range(200)]
+    bdd, (node,) = build_bdds([" ^ ".join(names)], long_names=True)
+    assert bdd.size(node) == 2 * 200 + 1
+    assert bdd.sat_count(node) == 2 ** 199
+    fixed = bdd.restrict(node, "x0", True)
+    assert bdd.sat_count(fixed) == 2 ** 199
+    assert bdd.evaluate(fixed, dict.fromkeys(names, False))
+
+def test_equivalent():
+    '''Equivalence ignores variables that do not matter'''
+    assert equivalent("!(A*B)", "!A+!B")
+    assert equivalent("A+!A", "B+!B")
+    assert not equivalent("A*B", "A+B")
+    bdd, (node,) = build_bdds(["A*!A"])
+    assert node == FALSE and bdd.any_sat(node) is None
@@ -0,0 +1,167 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+import io
+
+from ..src.boolean_expr_parser import TOO_MANY_VARS, BooleanExpr, \
+    evaluate_batch, truth_table_job
+
+def test_truth_table_or():
+    '''The formatted table for a simple OR'''
+    table = BooleanExpr("A+C").get_truth_table()
+    assert table.splitlines() == [
+        "+---+---+-----+",
+        "| A | C | A+C |",
+        "+---+---+-----+",
+        "| 0 | 0 | 0   |",
+        "| 0 | 1 | 1   |",
+        "| 1 | 0 | 1   |",
+        "| 1 | 1 | 1   |",
+        "+---+---+-----+",
+    ]
+
+def test_result_mask():
+    '''Bit i of the mask is row i of the table'''
+    assert BooleanExpr("A*B").get_result_mask() == 0b1000
+    assert BooleanExpr("A+!B*C").get_result_mask() == 0b11110010
+    assert BooleanExpr("A^B").get_result_mask() == 0b0110
+
+def test_result_mask_many_vars():
+    '''Twenty variables are evaluated without walking every row'''
+    exp = BooleanExpr("*".join("ABCDEFGHIJKLMNOPQRST"))
+    assert exp.get_result_mask() == 1 << (2 ** 20 - 1)
+    assert exp.count_true() == 1
+    assert exp.get_truth_table().startswith("Too many variables!")
+    # Refusing the table leaves the expression usable
+    assert not exp.error and exp.count_true() == 1
+    assert exp.get_signature() is not None
+    assert truth_table_job("A+B+C+D+E+F") == (None, TOO_MANY_VARS)
+
+def test_invalid_expression():
+    '''Errors are reported instead of a table'''
+    exp = BooleanExpr("ABCD")
+    assert exp.get_result_mask() is None
+    assert exp.count_true() is None
+    assert exp.get_row_result(dict.fromkeys("ABCD", True)) is None
+    assert "two variables in a row" in exp.get_truth_table()
+
+def test_compiled_evaluate():
+    '''The compiled function agrees with the result mask'''
+    exp = BooleanExpr("A^C+!(A * C)")
+    for a_val in (False, True):
+        for c_val in (False, True):
+            row = {'A': a_val, 'C': c_val}
+            assert exp.evaluate(row) == exp.get_row_result(row)
+
+def test_compiled_cache():
+    '''Identical expressions share one parse and compiled function'''
+    first = BooleanExpr("x + !y")
+    second = BooleanExpr("x+!y")
+    assert first.compile_exp() is second.compile_exp()
+    assert second.post_exp == ['x', 'y', '!', '+']
+    assert second.evaluate({'x': False, 'y': False})
+
+def test_instances_do_not_share_state():
+    '''Creating an expression does not touch an existing one'''
+    first = BooleanExpr("A+B")
+    BooleanExpr("x*y*z")
+    assert first.var_set == {'A', 'B'}
+    assert first.get_result_mask() == 0b1110
+
+def test_evaluate_batch():
+    '''Tables and errors come back in input order'''
+    exps = ["A+C", "ABCD", "A*C"] * 20
+    serial = evaluate_batch(exps)
+    assert serial[0] == (BooleanExpr("A+C").get_truth_table(), None)
+    assert serial[1] == (None,
+                         "Cannot have two variables in a row... (column 2)")
+    assert evaluate_batch(exps, "thread", max_workers=4) == serial
+
+def test_evaluate_batch_long_names():
+    '''Long names are passed on to every job, in every executor'''
+    exps = ["in_1 * !carry", "in_1 in_2"]
+    expected = [(BooleanExpr(exps[0], long_names=True).get_truth_table(),
+                 None),
+                (None, BooleanExpr(exps[1], long_names=True).error_msg)]
+    assert evaluate_batch(exps, long_names=True) == expected
+    assert evaluate_batch(exps, "thread", long_names=True) == expected
+    assert evaluate_batch(exps)[0][1]
+
+def test_long_names():
+    '''Multi-character identifiers are single variables'''
+    exp = BooleanExpr("in_17 * !(in_2 + carry)", long_names=True)
+    assert exp.get_var_list() == ['carry', 'in_17', 'in_2']
+    assert exp.post_exp == ['in_17', 'in_2', 'carry', '+', '!', '*']
+    assert exp.count_true() == 1
+
+def test_error_columns():
+    '''Syntax errors point at the offending column of the input'''
+    assert BooleanExpr("A ^ C + + B").error_col == 9
+    assert BooleanExpr("(A + B").error_col == 1
+    assert BooleanExpr("A + B)").error_col == 6
+    assert BooleanExpr("a b", long_names=True).error_col == 3
+    assert BooleanExpr("A + 3").error_msg == \
+        "3 is not a valid symbol! (column 5)"
+
+def test_double_negation():
+    '''Runs of negations cancel in pairs'''
+    assert BooleanExpr("!~~!x + y").post_exp == ['x', 'y', '+']
+    assert BooleanExpr("! ! !x").post_exp == ['x', '!']
+
+def test_long_expression():
+    '''Deeply nested, very long expressions parse and compile'''
+    names = ["in_{}".format(i) for i in range(5000)]
+    exp = BooleanExpr("(" * 4999 + " + ".join(n + ")" for n in names)[:-1],
+                      long_names=True)
+    assert not exp.error
+    assert len(exp.post_exp) == 9999
+    assert exp.evaluate(dict.fromkeys(names, False)) is False
+
+def test_iter_rows_across_blocks():
+    '''Rows stream in order, even past the first block'''
+    exp = BooleanExpr("A^B^C^D^E^F^G^H^I^J^K^L^M^N")
+    result_mask = exp.get_result_mask()
+    for row, values in enumerate(exp.iter_rows()):
+        assert values[-1] == result_mask >> row & 1
+    assert row == 2 ** 14 - 1
+    assert values == (1,) * 14 + (0,)
+
+def test_write_truth_table_styles():
+    '''CSV and Markdown tables are streamed to a file object'''
+    exp = BooleanExpr("A*B")
+    csv_file = io.StringIO()
+    assert exp.write_truth_table(csv_file, "csv", chunk_rows=2)
+    assert csv_file.getvalue() == "A,B,A*B\n0,0,0\n0,1,0\n1,0,0\n1,1,1\n"
+    md_file = io.StringIO()
+    exp.write_truth_table(md_file, "markdown")
+    assert md_file.getvalue().splitlines()[:3] == [
+        "| A | B | A*B |", "|---|---|-----|", "| 0 | 0 | 0   |"]
+    assert not BooleanExpr("A+").write_truth_table(io.StringIO())
+
+def test_errors_do_not_poison_cache():
+    '''An invalid spelling does not change a valid one parsed later'''
+    assert BooleanExpr("A!!*B").post_exp == ['A', 'B', '*']
+    assert BooleanExpr("A!*D").error
+    assert not BooleanExpr("A*D").error
+    assert BooleanExpr("P Q").error_col == 3
+    assert BooleanExpr("PQ").error_col == 2
+    assert BooleanExpr("a!!b", long_names=True).error
+    assert not BooleanExpr("ab", long_names=True).error
+    assert BooleanExpr("a!!b", long_names=True).error
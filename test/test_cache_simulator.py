@@ -0,0 +1,73 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+
+from ..src.cache_simulator import CacheGeometry, CacheLevel, CacheSimulator
+
+def test_geometry():
+    '''Addresses split into tag, index and block offset'''
+    geo = CacheGeometry.from_size(32768, 64, 8)
+    assert (geo.tag_bits, geo.index_bits, geo.block_bits) == (20, 6, 6)
+    assert geo.decode_address(0x12345678) == (0x12345, 0x19, 0x38)
+    assert geo.get_block_start_end(0x12345678) == ['0x12345640',
+                                                   '0x1234567F']
+    try:
+        CacheGeometry.from_size(3000, 64, 8)
+        assert False
+    except ValueError:
+        pass
+
+def test_lru_and_write_back():
+    '''A two way set keeps the two most recent lines, dirty ones written'''
+    level = CacheLevel(CacheGeometry(4, 1, 2), 2)
+    set_zero = [0x00, 0x08, 0x10]
+    assert not level.access(set_zero[0], True)
+    assert not level.access(set_zero[1])
+    assert level.access(set_zero[0])
+    assert not level.access(set_zero[2])
+    assert level.access(set_zero[0]) and not level.access(set_zero[1])
+    stats = level.get_stats()
+    assert stats["writebacks"] == 0 and stats["memory_reads"] == 4
+    assert not level.access(set_zero[2])
+    assert level.get_stats()["writebacks"] == 1
+    assert level.get_stats()["memory_writes"] == 1
+
+def test_write_through_no_allocate():
+    '''Writes go straight down and misses are not filled'''
+    level = CacheLevel(CacheGeometry(4, 1, 2), 2, write_back=False,
+                       write_allocate=False)
+    assert not level.access(0x04, True)
+    assert not level.access(0x04)
+    assert level.access(0x04, True)
+    stats = level.get_stats()
+    assert stats["memory_writes"] == 2 and stats["memory_reads"] == 1
+    level.flush()
+    assert level.get_stats()["writebacks"] == 0
+
+def test_hierarchy():
+    '''L1 misses are the L2 accesses'''
+    sim = CacheSimulator([{"size": 256, "block": 16, "ways": 2},
+                          {"size": 4096, "block": 16, "ways": 4,
+                           "policy": "fifo"}], address_bits=16)
+    stats = sim.run([(i * 16) % 2048 for i in range(1000)] +
+                    [(0x40, True)])
+    assert stats[1]["reads"] == stats[0]["misses"]
+    assert stats[1]["read_hits"] > 0
+    assert stats[1]["memory_reads"] == stats[1]["misses"] == 128
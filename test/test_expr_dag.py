@@ -0,0 +1,37 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+from ..src.boolean_expr_parser import BooleanExpr
+from ..src.expr_dag import ExprDag, gray_result_mask
+
+def test_gray_matches_bit_sliced():
+    '''Incremental evaluation agrees with the full table'''
+    for exp in ["A*B + !A*C", "!(A^B)*(C+!D) + A*!!D", "(A+B)*(A+B)*C"]:
+        assert gray_result_mask(exp) == BooleanExpr(exp).get_result_mask()
+
+def test_shared_sub_expressions():
+    '''Identical sub-expressions are stored once'''
+    dag = ExprDag()
+    one = dag.add(BooleanExpr("(A*B)^C"))
+    two = dag.add(BooleanExpr("C^(B*A)"))
+    assert one == two
+    # A, B, C, A*B and the XOR
+    assert len(dag) == 5
+    assert dag.deps[one] == 0b111
@@ -0,0 +1,60 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+import io
+import random
+
+from ..src.boolean_expr_parser import BooleanExpr
+from ..src.gate_simulator import GateSimulator, iter_stimulus
+
+ADDER = ["a^b^cin", "a*b + cin*(a^b)"]
+
+def make_stimulus(count):
+    '''A random stimulus for the full adder'''
+    rand = random.Random(7)
+    lines = ["# full adder", "cin, a, b"]
+    for _ in range(count):
+        lines.append("".join(rand.choice("01") for _ in range(3)))
+    return "\n".join(lines) + "\n"
+
+def expected(stimulus):
+    '''Evaluates every vector from scratch'''
+    names, vectors = iter_stimulus(io.StringIO(stimulus))
+    exp_objs = [BooleanExpr(exp, long_names=True) for exp in ADDER]
+    for vector in vectors:
+        dict_bool = dict(zip(names, vector))
+        yield tuple(int(exp_obj.evaluate(dict_bool)) for exp_obj in exp_objs)
+
+def test_event_driven_matches_evaluation():
+    '''Single vectors and batches agree with BooleanExpr'''
+    stimulus = make_stimulus(200)
+    want = list(expected(stimulus))
+    sim = GateSimulator(ADDER, long_names=True)
+    assert list(sim.run_file(io.StringIO(stimulus))) == want
+    assert list(sim.run_file(io.StringIO(stimulus), width=64)) == want
+
+def test_only_changed_gates_are_evaluated():
+    '''Repeating a vector evaluates nothing'''
+    sim = GateSimulator(ADDER, long_names=True)
+    list(sim.run(["a", "b", "cin"], [(1, 0, 1)]))
+    before = sim.evaluations
+    assert list(sim.run(["a", "b", "cin"], [(1, 0, 1)] * 10))[-1] == (0, 1)
+    # The reset to zeros and the first vector, but no repeats
+    assert sim.evaluations - before < 2 * len(sim.dag)
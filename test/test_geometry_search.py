@@ -0,0 +1,49 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+
+from ..src.geometry_search import hex_length, search
+from ..src.page_address_calc import AddressParser
+
+def test_constraints():
+    '''Only splits meeting every constraint are returned, best first'''
+    found = search(capacity_bytes=2 ** 20, word_bytes=4,
+                   page_bytes=(1024, 16384), aligned=[0x8000, 0x2000])
+    assert [(geo.page_bits, geo.offs_bits, geo.byte_bits)
+            for geo in found] == [(7, 11, 2), (8, 10, 2), (9, 9, 2),
+                                  (10, 8, 2)]
+    for geo in found:
+        chip = geo.to_parser()
+        assert chip.total_bits == 20 and chip.hex_length == geo.hex_length
+        page = 0x2000 >> (geo.offs_bits + geo.byte_bits)
+        assert chip.get_start_end(page)[0] == chip.format_hex(0x2000)
+    assert search(20, word_bytes=4, rank="most_pages", limit=1)[0] \
+        .page_bits == 18
+    assert search(8, aligned=[0x100]) == []
+    assert len(search(8, word_bytes=1, min_pages=64)) == 3
+    assert len(search(8, word_bytes=1, min_pages=0)) == 9
+    assert len(search(8, word_bytes=1, page_bytes=(0, 256))) == 9
+
+def test_wide_address_space():
+    '''64-bit address spaces are searched without building parsers'''
+    found = search(64, page_bytes=(4096, 2 ** 30), aligned=[2 ** 40])
+    assert len(found) == sum(31 - max(12, byte) for byte in range(31))
+    assert found[0].page_bits == 34
+    assert hex_length(64) == AddressParser(32, 32, 0).hex_length == 16
@@ -0,0 +1,42 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+
+from ..src.boolean_expr_parser import BooleanExpr
+from ..src.instrumentation import instrument, is_enabled
+from ..src.page_address_calc import AddressParser
+
+def test_phases_recorded():
+    '''Calls and rows are counted per phase, and only while enabled'''
+    seen = []
+    with instrument(callback=lambda *args: seen.append(args[0])) as stats:
+        exp_obj = BooleanExpr("A*B+!C")
+        exp_obj.process_all_exps()
+        AddressParser(4, 4, 0).get_start_end(3)
+        AddressParser(4, 4, 0).get_start_end(16)
+    exp_obj.evaluate({"A": True, "B": True, "C": False})
+    report = stats.as_dict()
+    assert not is_enabled()
+    assert report["format"] == dict(report["format"], calls=1, rows=8)
+    assert report["evaluate"]["rows"] == 8
+    assert report["address"]["calls"] == 2
+    assert report["address"]["rows"] == 1
+    assert report["to_hex"]["calls"] == 2
+    assert "format" in seen and "evaluate" in seen
@@ -0,0 +1,36 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+from ..src.boolean_expr_parser import BooleanExpr
+from ..src.logic_minimizer import minimize_exp
+
+def test_minimal_sop():
+    '''Classic simplifications'''
+    assert minimize_exp("A*B + A*!B") == "A"
+    assert minimize_exp("A*B + !A*C + B*C") in ("A*B + !A*C", "!A*C + A*B")
+    assert minimize_exp("A*!A") == "A*!A"
+    assert minimize_exp("A + !A*B + !B") == "A+!A"
+
+def test_round_trip():
+    '''Both methods give an equivalent expression'''
+    exp = "A^B^C + !(A+D)*E + B*!C*!E"
+    for method in ("qm", "espresso"):
+        sop = minimize_exp(exp, method)
+        assert BooleanExpr(sop).is_equivalent(BooleanExpr(exp))
@@ -0,0 +1,62 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+
+from ..src.memory_map import MemoryMap
+from ..src.page_address_calc import AddressParser
+
+def make_board():
+    '''A ROM at 0, a gap, then two RAM chips back to back'''
+    return MemoryMap([("ram1", AddressParser(2, 4, 2), 0x800),
+                      ("rom", AddressParser(3, 4, 0), 0x000),
+                      ("ram0", AddressParser(2, 4, 2), 0x700)])
+
+def test_build():
+    '''Regions are sorted, gaps found and overlaps rejected'''
+    board = make_board()
+    assert [region.name for region in board.regions] == \
+        ["rom", "ram0", "ram1"]
+    assert board.gaps == [(0x80, 0x700)]
+    try:
+        board.add("bad", AddressParser(1, 4, 0), 0x7F0)
+        assert False
+    except ValueError:
+        pass
+    assert len(board.regions) == 3
+    board.add("io", AddressParser(1, 4, 0), 0x1000)
+    assert board.gaps[-1] == (0x900, 0x1000)
+
+def test_route():
+    '''Addresses route to the chip fields, unmapped ones to None'''
+    board = make_board()
+    assert board.route(0x75B) == ("ram0", 1, 6, 3)
+    assert board.route(0x7F) == ("rom", 7, 15, 0)
+    assert board.route(0x80) is None
+    assert board.route(0x900) is None
+    assert board.get_start_end("ram1", 3) == ['0x8C0', '0x8FF']
+    assert board.get_start_end("ram1", 4) == "Invalid page number"
+    addresses = [0x75B, 0x80, 0x7F, 0x8C1, 0x10000]
+    indexes, pages, offsets, byte_sels = board.route_many(addresses)
+    assert list(indexes) == [1, -1, 0, 2, -1]
+    for i, address in enumerate(addresses):
+        if indexes[i] >= 0:
+            assert board.route(address) == (
+                board.regions[indexes[i]].name, pages[i], offsets[i],
+                byte_sels[i])
@@ -0,0 +1,55 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+from ..src.boolean_expr_parser import BooleanExpr, var_patterns
+from ..src.multi_output_expr import MultiBooleanExpr
+
+def test_half_adder_table():
+    '''One table with a column per output'''
+    adder = MultiBooleanExpr(["A^B", "A*B"])
+    assert adder.get_truth_table().splitlines() == [
+        "+---+---+-----+-----+",
+        "| A | B | A^B | A*B |",
+        "+---+---+-----+-----+",
+        "| 0 | 0 | 0   | 0   |",
+        "| 0 | 1 | 1   | 0   |",
+        "| 1 | 0 | 1   | 0   |",
+        "| 1 | 1 | 0   | 1   |",
+        "+---+---+-----+-----+",
+    ]
+
+def test_outputs_over_shared_vars():
+    '''Each output is evaluated over the union of the variables'''
+    exps = ["A*B + C", "!(A*B) ^ D", "C + D"]
+    bank = MultiBooleanExpr(exps)
+    var_list = bank.get_var_list()
+    full = 2 ** 16 - 1
+    for exp, mask in zip(exps, bank.get_result_masks()):
+        assert mask == BooleanExpr(exp).evaluate_bits(var_patterns(var_list),
+                                                      full)
+    # A, B, C, D, A*B, A*B + C, !(A*B), the XOR and C + D
+    assert len(bank.dag) == 9
+
+def test_invalid_output():
+    '''An invalid expression invalidates the bank'''
+    bank = MultiBooleanExpr(["A+B", "A+"])
+    assert bank.error
+    assert bank.get_result_masks() is None
+    assert "A+, is invalid" in bank.get_truth_table()
@@ -30,3 +30,74 @@ def test_page_0():
 def test_page_1():
     '''ITS NOT EMPTY'''
     assert True
+
+def test_to_hex_matches_format_hex():
+    '''Binary strings and integers give the same address'''
+    addy = ap(11, 17, 2)
+    assert addy.to_hex("1" * 30) == addy.format_hex(2 ** 30 - 1) \
+        == '0x3FFFFFFF'
+    assert addy.get_start_end(381) == ['0x0BE80000', '0x0BEFFFFF']
+
+def test_start_end_many():
+    '''The batch API agrees with `get_start_end` for ranges and lists'''
+    addy = ap(5, 3, 2)
+    for pages in (range(32), range(30, 2, -3), [7, 0, 31, 7]):
+        starts, ends = addy.get_start_end_many(pages)
+        expected = [addy.get_start_end(page) for page in pages]
+        assert [list(pair) for pair in zip(addy.format_hex_many(starts),
+                                           addy.format_hex_many(ends))] \
+            == expected
+    for pages in (range(33), [-1], range(-1, 3)):
+        try:
+            addy.get_start_end_many(pages)
+            assert False
+        except ValueError:
+            pass
+
+def test_start_end_many_wide_chip():
+    '''Addresses wider than 64 bits are returned as plain ints'''
+    addy = ap(40, 30, 2)
+    starts, ends = addy.get_start_end_many(range(2 ** 40 - 2, 2 ** 40))
+    assert list(starts) == [(2 ** 40 - 2) << 32, (2 ** 40 - 1) << 32]
+    assert ends[-1] == 2 ** 72 - 1
+
+def test_page_map():
+    '''The lazy page map agrees with `get_start_end`'''
+    addy = ap(5, 3, 2)
+    pages = addy.get_page_map()
+    assert len(pages) == 32
+    for entry in list(pages[::7]) + [pages[-1]]:
+        assert [addy.format_hex(entry[1]), addy.format_hex(entry[2])] \
+            == addy.get_start_end(entry[0])
+    window = pages[30:2:-4]
+    assert [entry[0] for entry in window] == list(range(30, 2, -4))
+    assert window.page_containing(addy.get_address_int(26, False)) \
+        == pages[26]
+    assert window.page_containing(addy.get_address_int(25, True)) is None
+    assert window.page_containing(2 ** 10) is None
+    assert pages[26] in window and window.index(pages[26]) == 1
+    assert next(window.iter_hex()) == (30, '0x3C0', '0x3DF')
+    assert [len(part) for part in pages.iter_windows(12)] == [12, 12, 8]
+
+def test_huge_page_map():
+    '''Chips with far more pages than fit in memory can be indexed'''
+    pages = ap(48, 12, 0).get_page_map()
+    assert len(pages) == 2 ** 48
+    assert pages[-1] == (2 ** 48 - 1, 2 ** 60 - 4096, 2 ** 60 - 1)
+    assert pages.page_containing(0x123456789ABC)[0] == 0x123456789
+    assert len(pages[::2 ** 20]) == 2 ** 28
+
+def test_page_map_past_len_limit():
+    '''Maps of 2^63 pages or more are counted and windowed without len'''
+    pages = ap(64, 0, 0).get_page_map()
+    assert pages.page_count == 2 ** 64
+    try:
+        len(pages)
+        assert False
+    except OverflowError:
+        pass
+    windows = pages[::-2 ** 62].iter_windows(3)
+    assert [part.page_count for part in windows] == [3, 1]
+    assert pages[::-2 ** 62][0][0] == 2 ** 64 - 1
+    assert next(reversed(pages))[0] == 2 ** 64 - 1
+    assert pages[5:2].page_count == 0
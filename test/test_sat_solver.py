@@ -0,0 +1,66 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+from ..src.boolean_expr_parser import BooleanExpr
+from ..src.sat_solver import SatSolver, count_models, solve_exp
+
+def test_models_match_truth_table():
+    '''Models satisfy the expression and counts match the table'''
+    for exp in ["A*!B + C*D", "A^B^C^D^E", "(A+B)*(!A+C)*(!B+!C)", "A*!A"]:
+        exp_obj = BooleanExpr(exp)
+        model = solve_exp(exp)
+        if exp_obj.count_true():
+            assert exp_obj.evaluate(model)
+        else:
+            assert model is None
+        assert count_models(exp) == exp_obj.count_true()
+
+def test_pigeonhole_unsat():
+    '''Four pigeons do not fit in three holes'''
+    def var(pigeon, hole):
+        '''CNF variable for pigeon in hole'''
+        return pigeon * 3 + hole + 1
+    clauses = [[var(p, h) for h in range(3)] for p in range(4)]
+    for hole in range(3):
+        for one in range(4):
+            for two in range(one):
+                clauses.append([-var(one, hole), -var(two, hole)])
+    assert SatSolver(12, clauses).solve() is None
+
+def test_many_variables():
+    '''Hundreds of variables are far beyond enumeration'''
+    names = ["x{}".format(i) for i in range(300)]
+    chain = " * ".join("(x{} + !x{})".format(i, i + 1)
+                       for i in range(299))
+    exp = "{} * x299 * !x0 + {}".format(chain, " * ".join(names))
+    assert count_models(" + ".join(names), long_names=True) == 2 ** 300 - 1
+    assert count_models(" ^ ".join(names), long_names=True) == 2 ** 299
+    assert solve_exp(exp, long_names=True) == dict.fromkeys(names, True)
+
+def test_count_product_of_xors():
+    '''Independent parts of a product are counted without rescanning'''
+    pairs = " * ".join("(a{0} ^ b{0})".format(i) for i in range(150))
+    assert count_models(pairs, long_names=True) == 2 ** 150
+    assert count_models(pairs + " * a0 * b0", long_names=True) == 0
+
+def test_count_thousands_of_inputs():
+    '''Counting does not recurse once per input'''
+    names = ["x{}".format(i) for i in range(1200)]
+    assert count_models(" + ".join(names), long_names=True) == 2 ** 1200 - 1
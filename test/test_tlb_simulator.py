@@ -0,0 +1,85 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+
+import os
+import tempfile
+
+from ..src.page_address_calc import AddressParser
+from ..src.tlb_simulator import (ClockReplacement, RandomReplacement,
+                                 TLBSimulator, make_policy, sweep)
+
+def pages_to_addresses(chip, pages):
+    '''The start address of each page'''
+    return [page << chip.page_shift for page in pages]
+
+def test_policies_evict():
+    '''LRU keeps recently used pages, FIFO and CLOCK differ from it'''
+    pages = [1, 2, 3, 1, 4, 1, 5]
+    evicted = {}
+    for name in ("lru", "fifo", "clock"):
+        policy = make_policy(name, 3)
+        evicted[name] = []
+        for page in pages:
+            if not policy.touch(page):
+                evicted[name].append(policy.insert(page))
+    assert evicted["lru"] == [None, None, None, 2, 3]
+    assert evicted["fifo"] == [None, None, None, 1, 2, 3]
+    assert evicted["clock"] == [None, None, None, 1, 2, 3]
+
+def test_remove_frees_slots():
+    '''Removed pages make room without evicting'''
+    for policy in (ClockReplacement(2), RandomReplacement(2, 1)):
+        policy.insert(1)
+        policy.insert(2)
+        policy.remove(1)
+        assert len(policy) == 1
+        assert policy.insert(3) is None
+        assert policy.touch(2) and policy.touch(3) and not policy.touch(1)
+
+def test_simulator_counts():
+    '''Faults invalidate the TLB entry of the evicted page'''
+    chip = AddressParser(4, 4, 0)
+    sim = TLBSimulator(chip, tlb_entries=4, frames=2, interval=4)
+    stats = sim.run(pages_to_addresses(chip, [0, 0, 1, 2, 0]) + [256])
+    assert stats["accesses"] == 5
+    assert stats["tlb_hits"] == 1
+    assert stats["page_faults"] == 4
+    assert stats["invalid"] == 1
+    assert stats["intervals"] == [{"end": 4, "accesses": 4, "tlb_hits": 1,
+                                   "tlb_misses": 3, "page_faults": 3}]
+    assert not sim.tlb.touch(1) and sim.tlb.touch(2)
+
+def test_sweep_trace():
+    '''Configurations swept in processes match running them here'''
+    chip = AddressParser(6, 4, 2)
+    addresses = [(i * 7919) % 5000 for i in range(3000)]
+    configs = [{"tlb_entries": 8, "tlb_policy": name, "frames": 16,
+                "page_policy": name} for name in ("lru", "clock", "random")]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.txt")
+        with open(path, "w") as trace_file:
+            trace_file.write("\n".join(hex(a) for a in addresses))
+        results = sweep(path, chip, configs, executor="process",
+                        max_workers=2)
+    for config, stats in zip(configs, results):
+        expected = TLBSimulator(chip, **config).run(addresses)
+        assert stats == dict(expected, config=config)
+        assert stats["invalid"] == sum(a >= 4096 for a in addresses)
@@ -0,0 +1,66 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+from ..src.boolean_expr_parser import BooleanExpr
+from ..src.truth_table_file import PackedTruthTable, write_packed
+
+def test_round_trip(tmp_path):
+    '''Values, ranges and counts match the in-memory result mask'''
+    path = str(tmp_path / "table.bxtt")
+    exp = BooleanExpr("A*!B + C^D + E*F*G*H*I*J*K*L*M*N*O*P*Q")
+    assert write_packed(exp, path, block_vars=4)
+    result_mask = exp.get_result_mask()
+    with PackedTruthTable(path) as table:
+        assert len(table) == 2 ** 17
+        assert table.var_list == exp.get_var_list()
+        assert table.to_expr().is_equivalent(exp)
+        assert table.popcount() == exp.count_true()
+        assert table.popcount(5, 1003) == \
+            bin(result_mask >> 5 & (2 ** 998 - 1)).count('1')
+        assert table.get_range(3, 40) == result_mask >> 3 & (2 ** 37 - 1)
+        for row in (0, 1, 7, 8, 12345, 2 ** 17 - 1):
+            assert table.value(row) == bool(result_mask >> row & 1)
+
+def test_tiny_table(tmp_path):
+    '''Tables smaller than a byte still round trip'''
+    path = str(tmp_path / "tiny.bxtt")
+    write_packed(BooleanExpr("!x"), path)
+    with PackedTruthTable(path) as table:
+        assert table.value_at({'x': False})
+        assert not table.value_at({'x': True})
+        assert table.popcount() == 1
+
+def test_truncated_files(tmp_path):
+    '''Short, cut off or foreign files raise ValueError'''
+    path = str(tmp_path / "table.bxtt")
+    write_packed(BooleanExpr("A*B+C*D"), path)
+    with open(path, "rb") as table_file:
+        packed = table_file.read()
+    for data, reason in ((packed[:10], "not a packed"),
+                         (b"GIF89a" + packed[6:], "not a packed"),
+                         (packed[:-1], "truncated"),
+                         (b"", "not a packed")):
+        with open(path, "wb") as table_file:
+            table_file.write(data)
+        try:
+            PackedTruthTable(path)
+            assert False
+        except ValueError as err:
+            assert reason in str(err)
@@ -0,0 +1,40 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+from ..src.boolean_expr_parser import BooleanExpr
+from ..src.truth_table_index import SignatureIndex
+
+def test_equivalent():
+    '''De Morgan's law holds'''
+    assert BooleanExpr("!(A*B)").is_equivalent(BooleanExpr("!A+!B"))
+    assert not BooleanExpr("A*B").is_equivalent(BooleanExpr("A+B"))
+    assert not BooleanExpr("A").is_equivalent(BooleanExpr("B"))
+
+def test_duplicates(tmp_path):
+    '''Equivalent expressions are grouped, and survive a round trip'''
+    index = SignatureIndex()
+    index.add_many(["A+B", "B + A", "!(!A*!B)", "A*B", "AB"])
+    assert index.duplicates() == [["A+B", "B + A", "!(!A*!B)"]]
+    assert list(index.invalid) == ["AB"]
+    path = str(tmp_path / "index.json")
+    index.save(path)
+    loaded = SignatureIndex.load(path)
+    assert loaded.find_equivalent("!(!B*!A)") == ["A+B", "B + A", "!(!A*!B)"]
+    assert "A*B" in loaded
@@ -0,0 +1,96 @@
+'''
+------------------------------- LICENSE ---------------------------------------
+hardware_scripts; Basic scripts to validate my work in my hardware class
+Copyright (C) 2018, Thomas Kercheval
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+-------------------------------------------------------------------------------
+'''
+
+
+import asyncio
+import json
+
+from ..src.boolean_expr_parser import BooleanExpr
+from ..src.truth_table_service import TruthTableService
+
+def test_coalesce_and_cache():
+    '''Concurrent identical requests share one computation'''
+    async def run():
+        service = TruthTableService("thread", 2)
+        try:
+            results = await asyncio.gather(
+                service.get_table("A*B+C"), service.get_table("A * B + C"),
+                service.get_table("A*B+C"))
+            again = await service.get_table("A * B + C")
+            error = await service.get_table("A**B")
+        finally:
+            service.close()
+        return service.get_stats(), results, again, error
+    stats, results, again, error = asyncio.run(run())
+    expected = BooleanExpr("A*B+C").get_truth_table()
+    spaced = BooleanExpr("A * B + C").get_truth_table()
+    assert results == [(expected, None), (spaced, None), (expected, None)]
+    assert again == (spaced, None)
+    assert error == (None, BooleanExpr("A**B").error_msg)
+    assert stats["computed"] == 3
+    assert stats["coalesced"] == 1
+    assert stats["hits"] == 1
+    assert stats["pending"] == 0
+
+def test_interfaces():
+    '''Both the HTTP and line interfaces answer with the table'''
+    async def run():
+        service = TruthTableService("thread", 1)
+        http = await service.start_http(port=0)
+        lines = await service.start_lines(port=0)
+        try:
+            reader, writer = await asyncio.open_connection(
+                *http.sockets[0].getsockname()[:2])
+            writer.write(b"GET /table?exp=A%2B!B HTTP/1.0\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+            reader, writer = await asyncio.open_connection(
+                *lines.sockets[0].getsockname()[:2])
+            writer.write(b'{"exp": "A+!B"}\nnot json\n')
+            replies = [json.loads(await reader.readline()) for _ in range(2)]
+            writer.close()
+        finally:
+            http.close()
+            lines.close()
+            service.close()
+        return response, replies
+    response, replies = asyncio.run(run())
+    expected = BooleanExpr("A+!B").get_truth_table()
+    assert response.startswith(b"HTTP/1.0 200 OK")
+    assert response.endswith(expected.encode())
+    assert replies[0] == {"table": expected, "error": None}
+    assert replies[1]["table"] is None
+
+def test_spellings_do_not_share_tables():
+    '''Each spelling gets its own header and error columns'''
+    async def run():
+        service = TruthTableService("thread", 1)
+        try:
+            return [await service.get_table(exp) for exp in
+                    ("A  +  B", "A+B", "A * * B", "A**B")]
+        finally:
+            service.close()
+    results = asyncio.run(run())
+    assert results[0] == (BooleanExpr("A  +  B").get_truth_table(), None)
+    assert results[1] == (BooleanExpr("A+B").get_truth_table(), None)
+    assert results[0] != results[1]
+    assert results[2][1].endswith("(column 5)")
+    assert results[3] == (None, BooleanExpr("A**B").error_msg)
+    assert results[3][1].endswith("(column 3)")